@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Append-only archive of the raw listing page HTML the scraper fetched
+Pages are stored as independently compressed members of one data file with
+a JSONL index of offsets and fetch metadata next to it, so they can be
+re-parsed later without touching the network
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip members are always available
+    zstandard = None
+
+from scraper import DEFAULT_PARSE_BACKEND, Candidate, FetchResult, PageCache, parse_listing
+
+logger = logging.getLogger(__name__)
+
+CODECS = ('gzip', 'zstd')
+DEFAULT_CODEC = 'gzip'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+# Index fields that locate a member in the data file
+MEMBER_FIELDS = ('offset', 'length', 'codec', 'size', 'sha256')
+
+
+def index_path(path: str) -> str:
+    return f"{path}.idx.jsonl"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    # A fixed mtime keeps the member bytes a function of the page alone
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("The archive has zstd members, which require the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def base_url_of(url: str) -> str:
+    """Base URL a listing page was fetched from, which its relative links resolve against"""
+    return url.split('?', 1)[0]
+
+
+def read_index(path: str) -> List[Dict]:
+    """Every index record of an archive in write order, ignoring a torn last line"""
+    records = []
+    try:
+        with open(index_path(path), 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                records.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return records
+
+
+class PageArchive:
+    """Appends fetched pages to ARCHIVE and their records to ARCHIVE.idx.jsonl.
+
+    Each body is one complete gzip (or zstd) member, so the data file is
+    itself a valid multi-member stream and any page can be decompressed
+    on its own. An index line is written only after its member is on
+    disk: a crash can leave unreferenced bytes at the end of the data
+    file, never a record pointing at missing data. Refetches with the
+    same content hash and 304 responses add a record pointing at the
+    page's existing member instead of storing the body again.
+    """
+
+    def __init__(self, path: str, codec: str = DEFAULT_CODEC):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec {codec!r}, expected one of {CODECS}")
+        if codec == 'zstd' and zstandard is None:
+            raise RuntimeError("The zstd archive codec requires the zstandard package")
+        self.path = path
+        self.codec = codec
+        self.latest = {record['page']: record for record in read_index(path)}
+        self.members_written = 0
+        self._data = open(path, 'ab')
+        self._index = open(index_path(path), 'a', encoding='utf-8')
+
+    def __contains__(self, page_num: int) -> bool:
+        """Whether a body of this page is archived, which a 304 response can point back at"""
+        return page_num in self.latest
+
+    def add(self, page_num: int, url: str, result: FetchResult):
+        """Record one successful fetch of a page"""
+        record = {
+            'page': page_num,
+            'url': url,
+            'status': result.status,
+            'etag': result.etag,
+            'last_modified': result.last_modified,
+            'fetched_at': time.time(),
+        }
+        previous = self.latest.get(page_num)
+        if result.status == 200:
+            content_hash = PageCache.content_hash(result.text)
+            if previous and previous['sha256'] == content_hash:
+                record.update({field: previous[field] for field in MEMBER_FIELDS})
+            else:
+                raw = result.text.encode('utf-8')
+                member = compress(raw, self.codec)
+                offset = self._data.tell()
+                self._data.write(member)
+                self._data.flush()
+                os.fsync(self._data.fileno())
+                record.update(offset=offset, length=len(member), codec=self.codec, size=len(raw),
+                              sha256=content_hash)
+                self.members_written += 1
+        elif previous:
+            # Not modified: the body is the one archived last time
+            record.update({field: previous[field] for field in MEMBER_FIELDS})
+        else:
+            return
+        self._index.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._index.flush()
+        self.latest[page_num] = record
+
+    def close(self):
+        if not self._data.closed:
+            self._data.close()
+            self._index.close()
+            logger.info(f"Archived {self.members_written} new pages to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ArchiveReader:
+    """Random access to the members of an archive's data file through mmap"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def read(self, record: Dict) -> str:
+        """HTML of the member an index record points at"""
+        member = self._map[record['offset']:record['offset'] + record['length']]
+        return decompress(member, record['codec']).decode('utf-8')
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+def latest_pages(paths: List[str], max_pages: Optional[int] = None) -> List[Tuple[str, Dict]]:
+    """(archive path, record) of the most recent fetch of every page across archives, by page number"""
+    latest = {}
+    for path in paths:
+        for record in read_index(path):
+            if max_pages and record['page'] > max_pages:
+                continue
+            current = latest.get(record['page'])
+            if current is None or record['fetched_at'] >= current[1]['fetched_at']:
+                latest[record['page']] = (path, record)
+    return [latest[page_num] for page_num in sorted(latest)]
+
+
+def missing_pages(pages: List[Tuple[str, Dict]]) -> List[int]:
+    """Page numbers between 1 and the highest archived page that have no archived body"""
+    archived = {record['page'] for _, record in pages}
+    return [page_num for page_num in range(1, max(archived, default=0) + 1) if page_num not in archived]
+
+
+_readers = {}  # archive path -> ArchiveReader, one set per replay worker process
+
+
+def parse_archived(path: str, record: Dict, backend: str = DEFAULT_PARSE_BACKEND) -> Tuple[int, List[Candidate]]:
+    """Parse one archived page, mapping its archive on first use in this process"""
+    reader = _readers.get(path)
+    if reader is None:
+        reader = _readers[path] = ArchiveReader(path)
+    page_num = record['page']
+    return page_num, parse_listing(reader.read(record), page_num, backend, base_url_of(record['url']))
+
+
+def replay_archive(paths: List[str], sink, workers: Optional[int] = None, backend: str = DEFAULT_PARSE_BACKEND,
+                   max_pages: Optional[int] = None) -> int:
+    """Re-parse the latest archived HTML of every page into a sink, without any network.
+
+    Pages are parsed in a pool of `workers` processes that each mmap the
+    archives, and reach the sink (a CsvSink, SqliteSink or MultiSink) in
+    page order, as they would from scrape_all_pages(). Returns the number
+    of candidates written.
+    """
+    pages = latest_pages(paths, max_pages)
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Replaying {len(pages)} archived pages with {workers} parse workers")
+    jobs = ([path for path, _ in pages], [record for _, record in pages], [backend] * len(pages))
+    executor = None
+    if workers > 1 and len(pages) > 1:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        results = executor.map(parse_archived, *jobs, chunksize=max(1, len(pages) // (workers * 4)))
+    else:
+        results = map(parse_archived, *jobs)
+
+    total = 0
+    try:
+        for page_num, candidates in results:
+            sink.write_page(page_num, candidates)
+            total += len(candidates)
+    finally:
+        if executor:
+            executor.shutdown()
+        else:
+            for reader in _readers.values():
+                reader.close()
+            _readers.clear()
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Inspect a raw-HTML page archive written by scraper.py --archive')
+    parser.add_argument('archive', help='archive data file')
+    parser.add_argument('--page', type=int, help='print the latest archived HTML of this page')
+    args = parser.parse_args(argv)
+
+    pages = latest_pages([args.archive])
+    if args.page is not None:
+        records = [record for _, record in pages if record['page'] == args.page]
+        if not records:
+            parser.error(f"page {args.page} is not in {args.archive}")
+        reader = ArchiveReader(args.archive)
+        try:
+            sys.stdout.write(reader.read(records[0]))
+        finally:
+            reader.close()
+        return 0
+
+    records = read_index(args.archive)
+    stored = sum(record['length'] for record in {r['offset']: r for r in records}.values())
+    raw = sum(record['size'] for record in {r['offset']: r for r in records}.values())
+    print(f"{len(records)} fetches of {len(pages)} pages, {stored / 1e6:.2f} MB stored "
+          f"({raw / 1e6:.2f} MB uncompressed)")
+    for _, record in pages:
+        fetched = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['fetched_at']))
+        print(f"page {record['page']:>5}  {fetched}  HTTP {record['status']}  {record['size']:>8} bytes  "
+              f"{record['codec']}  {record['sha256'][:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
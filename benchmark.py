@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the KADR ENIC scraper
+Parser throughput and parity, end-to-end scrapes against a local mock server,
+candidate record memory, categorizer scaling and chart data loading
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import html
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from scraper import BASE_URL, DEFAULT_PARSE_BACKEND, PARSE_BACKENDS, PARSE_MODES, parse_listing
+
+ITEMS_PER_PAGE = 12
+
+
+def load_rows(filename: str = 'kadr_enic_candidates.csv') -> List[Dict[str, str]]:
+    """Load candidate rows used to synthesize listing pages"""
+    with open(filename, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    import resource
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _relative(url: str) -> str:
+    return url[len(BASE_URL) - 1:] if url.startswith(BASE_URL) else url
+
+
+def render_listing_page(rows: List[Dict[str, str]], page_num: int, page_count: int) -> str:
+    """Render a listing page with the site's list-item / OpenPop(...) markup"""
+    def attr(value: str) -> str:
+        # OpenPop arguments are single-quoted, the site never emits quotes inside them
+        return html.escape(value.replace("'", ''), quote=True)
+
+    out = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>Kadr</title></head><body>',
+           '<div class="list">']
+    for row in rows:
+        args = "','".join(attr(row.get(field, '')) for field in (
+            'surname', 'first_name', 'specialization_detailed', 'photo_url_detailed',
+            'certificate_url', 'birth_date', 'country_detailed', 'university', 'education_level'))
+        out.append(
+            '<div class="list-item">\n'
+            f'  <a href="javascript:void(0)" onclick="OpenPop(\'{args}\')">\n'
+            f'    <img src="{attr(_relative(row.get("photo_url", "")))}" alt="">\n'
+            f'    <span class="top">{html.escape(row.get("name", ""))}</span>\n'
+            f'    <div class="pos">{html.escape(row.get("country", ""))}<br>'
+            f'{html.escape(row.get("specialization", ""))}</div>\n'
+            '  </a>\n'
+            '</div>')
+    out.append('</div><ul class="pagination">')
+    for n in sorted({1, max(1, page_num - 1), page_num, min(page_count, page_num + 1), page_count}):
+        out.append(f'<li><a href="?page={n}">{n}</a></li>')
+    out.append('</ul></body></html>')
+    return '\n'.join(out)
+
+
+def synthetic_pages(rows: List[Dict[str, str]], page_count: int) -> List[Tuple[int, str]]:
+    """Build page_count listing pages by cycling through the given rows"""
+    pages = []
+    for page_num in range(1, page_count + 1):
+        start = ((page_num - 1) * ITEMS_PER_PAGE) % max(len(rows), 1)
+        page_rows = (rows[start:] + rows[:start])[:ITEMS_PER_PAGE]
+        pages.append((page_num, render_listing_page(page_rows, page_num, page_count)))
+    return pages
+
+
+FIXTURE_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'listing_pages')
+
+
+def saved_pages(directory: str) -> List[Tuple[int, str]]:
+    """Load saved pages named like page_12.html from a directory"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        match = re.search(r'(\d+)', os.path.basename(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((int(match.group(1)) if match else 0, f.read()))
+    return pages
+
+
+def check_parity(pages: List[Tuple[int, str]], reference: str = 'bs4') -> int:
+    """Compare every backend against the reference, returning the mismatch count"""
+    mismatches = 0
+    for page_num, page_html in pages:
+        expected = parse_listing(page_html, page_num, reference)
+        for backend in PARSE_BACKENDS:
+            if backend == reference:
+                continue
+            actual = parse_listing(page_html, page_num, backend)
+            if actual != expected:
+                mismatches += 1
+                print(f"✗ page {page_num}: {backend} differs from {reference} "
+                      f"({len(actual)} vs {len(expected)} candidates)")
+    return mismatches
+
+
+def bench_parse(args):
+    if args.pages_dir:
+        pages = saved_pages(args.pages_dir)
+    else:
+        pages = synthetic_pages(load_rows(args.input), args.pages)
+    if not pages:
+        print("✗ No pages to benchmark")
+        return 1
+    print(f"Benchmarking parsers on {len(pages)} pages")
+
+    # The fixture pages cover markup the synthetic renderer never emits (single-line div.pos, comments, entities)
+    mismatches = check_parity(saved_pages(FIXTURE_PAGES_DIR) + pages)
+    if mismatches:
+        print(f"✗ {mismatches} page(s) differ between backends")
+        return 1
+    print("✓ All backends produce identical candidates")
+
+    for backend in PARSE_BACKENDS:
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for page_num, page_html in pages:
+                parse_listing(page_html, page_num, backend)
+            best = min(best, time.perf_counter() - start)
+        print(f"{backend:>6}: {len(pages) / best:10.1f} pages/sec ({best * 1000:.1f} ms for {len(pages)} pages)")
+    return 0
+
+
+def legacy_categorize(spec):
+    """The original any()-per-keyword categorizer, kept as the reference"""
+    from generate_charts import SPECIALIZATION_CATEGORIES
+    spec_lower = str(spec).lower()
+    for name, keywords in SPECIALIZATION_CATEGORIES:
+        if any(word in spec_lower for word in keywords):
+            return name
+    return 'Other'
+
+
+def bench_categorize(args):
+    import numpy as np
+    import pandas as pd
+    from generate_charts import DEFAULT_CATEGORIZER
+
+    specs = pd.read_csv(args.input, usecols=['specialization'])['specialization'].dropna().unique()
+    rng = np.random.default_rng(0)
+    print(f"Categorizing synthetic rows drawn from {len(specs)} distinct specializations")
+
+    for rows in args.rows:
+        series = pd.Series(rng.choice(specs, size=rows))
+
+        start = time.perf_counter()
+        expected = series.apply(legacy_categorize) if rows <= args.legacy_max_rows else None
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = DEFAULT_CATEGORIZER.categorize_series(series)
+        engine_time = time.perf_counter() - start
+
+        if expected is not None:
+            if not expected.equals(actual):
+                print(f"✗ {rows} rows: categorizer output differs from the reference")
+                return 1
+            print(f"{rows:>10} rows: apply {legacy_time:8.3f}s, engine {engine_time:8.3f}s "
+                  f"({legacy_time / engine_time:.0f}x)")
+        else:
+            print(f"{rows:>10} rows: apply   skipped, engine {engine_time:8.3f}s")
+    return 0
+
+
+def _load_scenario(scenario: str, path: str):
+    """Run one loader in a fresh process, returning (seconds, peak RSS growth in MB)"""
+    import pandas as pd
+    import generate_charts
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if scenario == 'legacy':
+        df = pd.read_csv(path)
+        df_clean = df[df['name'] != '--'].copy()
+        df_clean = df_clean[df_clean['country'] != '--'].copy()
+    else:
+        df = generate_charts.load_candidates(path)
+        df_clean = df[(df['name'] != '--') & (df['country'] != '--')].copy()
+    elapsed = time.perf_counter() - start
+    return elapsed, peak_rss_mb() - before
+
+
+def replicate_csv(source: str, path: str, scale: int) -> int:
+    """Write the rows of source scale times over under one header, returning the row count"""
+    with open(source, 'r', encoding='utf-8') as src, open(path, 'w', encoding='utf-8') as dst:
+        header = src.readline()
+        body = src.read()
+        dst.write(header)
+        for _ in range(scale):
+            dst.write(body)
+    return len(body.splitlines()) * scale
+
+
+def bench_load(args):
+    import multiprocessing
+    import tempfile
+    from generate_charts import sidecar_path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'candidates.csv')
+        rows = replicate_csv(args.input, path, args.scale)
+        print(f"Loading {rows} rows ({os.path.getsize(path) / 1e6:.1f} MB CSV)")
+
+        ctx = multiprocessing.get_context('spawn')
+        for scenario, label in (('legacy', 'read_csv, all columns'),
+                                ('csv', 'load_candidates from CSV'),
+                                ('parquet', 'load_candidates from sidecar')):
+            if scenario == 'csv' and os.path.exists(sidecar_path(path)):
+                os.remove(sidecar_path(path))
+            with ctx.Pool(1) as pool:
+                elapsed, peak = pool.apply(_load_scenario, (scenario, path))
+            print(f"{label:>30}: {elapsed:7.3f}s, peak RSS +{peak:8.1f} MB")
+    return 0
+
+
+def _aggregate_scenario(chunksize: int, path: str):
+    """Aggregate a CSV in a fresh process, in memory (chunksize 0) or streamed.
+
+    Returns (seconds, peak RSS growth in MB, statistics.txt text).
+    """
+    import contextlib
+    import io
+    import tempfile
+    import generate_charts
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if chunksize:
+        aggregates = generate_charts.compute_aggregates_chunked(path, chunksize)
+    else:
+        aggregates = generate_charts.compute_aggregates(generate_charts.load_candidates(path))
+    elapsed = time.perf_counter() - start
+    growth = peak_rss_mb() - before
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        generate_charts.report_statistics(aggregates, tmp_dir)
+        with open(os.path.join(tmp_dir, 'statistics.txt'), 'r', encoding='utf-8') as f:
+            statistics = f.read()
+    return elapsed, growth, statistics
+
+
+def bench_aggregate(args):
+    import multiprocessing
+    import tempfile
+    from generate_charts import sidecar_path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'candidates.csv')
+        rows = replicate_csv(args.input, path, args.scale)
+        print(f"Aggregating {rows} rows ({os.path.getsize(path) / 1e6:.1f} MB CSV)")
+
+        ctx = multiprocessing.get_context('spawn')
+        reference = None
+        for chunksize in [0] + args.chunksizes:
+            if os.path.exists(sidecar_path(path)):
+                os.remove(sidecar_path(path))
+            with ctx.Pool(1) as pool:
+                elapsed, growth, statistics = pool.apply(_aggregate_scenario, (chunksize, path))
+            if reference is None:
+                reference = statistics
+            label = f"chunks of {chunksize}" if chunksize else 'in memory'
+            parity = 'same statistics' if statistics == reference else 'STATISTICS DIFFER'
+            print(f"{label:>20}: {elapsed:7.3f}s, peak RSS +{growth:8.1f} MB, {parity}")
+            if statistics != reference:
+                return 1
+    return 0
+
+
+def _records_scenario(kind: str, path: str, count: int):
+    """Build `count` candidates in a fresh process, returning (build s, peak RSS growth MB, CSV write s)"""
+    import tempfile
+    from scraper import Candidate, KadrEnicScraper
+
+    rows = load_rows(path)
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    candidates = []
+    for i in range(count):
+        # Fresh string objects per row, as a parser produces them
+        fields = {key: (value + ' ')[:-1] for key, value in rows[i % len(rows)].items()}
+        fields['page_number'] = i // ITEMS_PER_PAGE + 1
+        candidates.append(Candidate(fields) if kind == 'candidate' else fields)
+    elapsed = time.perf_counter() - start
+    growth = peak_rss_mb() - before
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        KadrEnicScraper(cache_dir=None).save_to_csv(candidates, os.path.join(tmp_dir, 'out.csv'))
+        write = time.perf_counter() - start
+    return elapsed, growth, write
+
+
+def bench_records(args):
+    import logging
+    import multiprocessing
+
+    logging.getLogger('scraper').setLevel(logging.WARNING)
+    print(f"Holding {args.rows} synthetic candidates in memory")
+    ctx = multiprocessing.get_context('spawn')
+    for kind, label in (('dict', 'dict per candidate'), ('candidate', 'Candidate, interned fields')):
+        with ctx.Pool(1) as pool:
+            elapsed, growth, write = pool.apply(_records_scenario, (kind, args.input, args.rows))
+        print(f"{label:>27}: build {elapsed:6.2f}s, peak RSS +{growth:8.1f} MB "
+              f"({growth * 1024 * 1024 / args.rows:5.0f} B/row), save_to_csv {write:6.2f}s")
+    return 0
+
+
+def bench_replay(args):
+    import logging
+    import tempfile
+    from archive import PageArchive, replay_archive
+    from scraper import CsvSink, FetchResult
+
+    logging.getLogger().setLevel(logging.WARNING)
+    pages = synthetic_pages(load_rows(args.input), args.pages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, f"pages.{args.codec}")
+        start = time.perf_counter()
+        with PageArchive(path, args.codec) as page_archive:
+            for page_num, page_html in pages:
+                page_archive.add(page_num, f"{BASE_URL}?page={page_num}", FetchResult(status=200, text=page_html))
+        elapsed = time.perf_counter() - start
+        raw = sum(len(page_html.encode('utf-8')) for _, page_html in pages)
+        print(f"Archived {len(pages)} pages in {elapsed:.2f}s: {raw / 1e6:.1f} MB -> "
+              f"{os.path.getsize(path) / 1e6:.2f} MB ({args.codec})")
+
+        outputs = set()
+        for workers in args.workers:
+            output = os.path.join(tmp_dir, f"replay-{workers}.csv")
+            start = time.perf_counter()
+            with CsvSink(output) as sink:
+                replay_archive([path], sink, workers=workers, backend=args.backend)
+            elapsed = time.perf_counter() - start
+            with open(output, 'rb') as f:
+                outputs.add(hashlib.sha256(f.read()).hexdigest())
+            print(f"{workers:>3} worker(s): {elapsed:6.2f}s, {len(pages) / elapsed:8.1f} pages/sec, "
+                  f"{sink.rows_written} rows")
+        if len(outputs) != 1:
+            print("✗ Replays with different worker counts wrote different CSVs")
+            return 1
+        print("✓ Every worker count wrote the same CSV")
+    return 0
+
+
+def make_mock_app(pages: List[str], latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                  timeout_rate: float = 0.0, timeout_delay: float = 5.0, seed: int = 0):
+    """aiohttp app serving pre-rendered ?page=N listings with injected latency and faults.
+
+    Pages past the end are served as empty listings, like the real site.
+    Responses carry an ETag and honour If-None-Match so the page cache
+    can be exercised too.
+    """
+    import asyncio
+    import hashlib
+    import random
+    from aiohttp import web
+
+    rng = random.Random(seed)
+    empty_page = render_listing_page([], len(pages) + 1, len(pages))
+    etags = ['"%s"' % hashlib.md5(page.encode('utf-8')).hexdigest() for page in pages]
+
+    async def listing(request):
+        delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+        roll = rng.random()
+        if roll < timeout_rate:
+            await asyncio.sleep(timeout_delay)
+        elif roll < timeout_rate + error_rate:
+            await asyncio.sleep(delay)
+            return web.Response(status=503, text='Service Unavailable')
+        await asyncio.sleep(delay)
+
+        try:
+            page_num = int(request.query.get('page', '1'))
+        except ValueError:
+            page_num = 1
+        if not 1 <= page_num <= len(pages):
+            return web.Response(text=empty_page, content_type='text/html')
+        etag = etags[page_num - 1]
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=pages[page_num - 1], content_type='text/html', headers={'ETag': etag})
+
+    app = web.Application()
+    app.router.add_get('/', listing)
+    return app
+
+
+def _serve_mock(pages: List[str], options: Dict, port_queue):
+    """Process entry point: run the mock server and report its port"""
+    import asyncio
+    from aiohttp import web
+
+    async def serve():
+        runner = web.AppRunner(make_mock_app(pages, **options), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _run_scrape(base_url: str, args) -> Dict:
+    import tempfile
+    import scraper
+
+    fetch_latencies = []
+
+    class BenchmarkScraper(scraper.KadrEnicScraper):
+        async def fetch_page(self, url, headers=None, reserve=False):
+            start = time.perf_counter()
+            try:
+                return await super().fetch_page(url, headers, reserve)
+            finally:
+                fetch_latencies.append(time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        async with BenchmarkScraper(cache_dir=args.cache_dir, parse_backend=args.backend,
+                                    concurrency=args.concurrency, base_url=base_url,
+                                    request_timeout=args.request_timeout, parse_mode=args.parse_mode,
+                                    parse_workers=args.parse_workers) as bench_scraper:
+            start = time.perf_counter()
+            with scraper.CsvSink(os.path.join(tmp_dir, 'out.csv')) as sink:
+                await bench_scraper.scrape_all_pages(sink=sink)
+            wall = time.perf_counter() - start
+            rows = sink.rows_written
+            failed = len(bench_scraper.failed_pages)
+            pages = bench_scraper.max_pages
+            metrics = bench_scraper.metrics
+            # URLs in the rows carry the mock server's random port
+            with open(os.path.join(tmp_dir, 'out.csv'), 'r', encoding='utf-8') as f:
+                output = f.read().replace(base_url, BASE_URL)
+            output_hash = hashlib.sha256(output.encode('utf-8')).hexdigest()
+
+    return {
+        'pages': pages,
+        'rows': rows,
+        'failed_pages': failed,
+        'wall': wall,
+        'pages_per_sec': pages / wall if wall else 0.0,
+        'p50': _percentile(fetch_latencies, 50),
+        'p99': _percentile(fetch_latencies, 99),
+        'http_p50': metrics.fetch_latency.quantile(0.5),
+        'http_p99': metrics.fetch_latency.quantile(0.99),
+        'slot_wait_p99': metrics.slot_wait.quantile(0.99),
+        'retries': metrics.retries,
+        'parse_cpu': metrics.parse_time.sum,
+        'output_hash': output_hash,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def bench_e2e(args):
+    import asyncio
+    import logging
+    import multiprocessing
+
+    logging.getLogger().setLevel(logging.WARNING)
+    pages = [page_html for _, page_html in synthetic_pages(load_rows(args.input), args.pages)]
+    options = {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+               'timeout_rate': args.timeout_rate, 'timeout_delay': args.request_timeout + 1, 'seed': args.seed}
+
+    ctx = multiprocessing.get_context('spawn')
+    port_queue = ctx.Queue()
+    server = ctx.Process(target=_serve_mock, args=(pages, options, port_queue), daemon=True)
+    server.start()
+    try:
+        port = port_queue.get(timeout=30)
+        result = asyncio.run(_run_scrape(f"http://127.0.0.1:{port}/", args))
+    finally:
+        server.terminate()
+        server.join()
+
+    print(f"Scraped {result['pages']} pages / {result['rows']} rows from the mock server "
+          f"({result['failed_pages']} failed)")
+    print(f"  wall time:      {result['wall']:8.2f} s")
+    print(f"  throughput:     {result['pages_per_sec']:8.1f} pages/sec")
+    print(f"  fetch_page:     p50 {result['p50'] * 1000:.1f} ms, p99 {result['p99'] * 1000:.1f} ms "
+          f"(including slot wait and retries)")
+    print(f"  HTTP attempt:   p50 {result['http_p50'] * 1000:.1f} ms, p99 {result['http_p99'] * 1000:.1f} ms "
+          f"(bucketed), {result['retries']} retries")
+    print(f"  slot wait:      p99 {result['slot_wait_p99'] * 1000:.1f} ms (bucketed)")
+    print(f"  parse CPU time: {result['parse_cpu']:8.3f} s ({args.parse_mode} mode)")
+    print(f"  output sha256:  {result['output_hash'][:16]}")
+    print(f"  peak RSS:       {result['peak_rss_mb']:8.1f} MB")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse_cmd = subparsers.add_parser('parse', help='parser parity check and throughput in pages/sec')
+    parse_cmd.add_argument('--pages-dir', help='directory of saved page_N.html files (default: synthetic pages)')
+    parse_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV used to synthesize pages')
+    parse_cmd.add_argument('--pages', type=int, default=150, help='number of synthetic pages')
+    parse_cmd.add_argument('--repeat', type=int, default=3, help='timing repetitions, best is reported')
+    parse_cmd.set_defaults(func=bench_parse)
+
+    categorize_cmd = subparsers.add_parser('categorize', help='specialization categorizer scaling')
+    categorize_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV to draw specializations from')
+    categorize_cmd.add_argument('--rows', type=lambda v: [int(n) for n in v.split(',')],
+                                default=[10_000, 100_000, 1_000_000, 5_000_000],
+                                help='comma-separated synthetic row counts')
+    categorize_cmd.add_argument('--legacy-max-rows', type=int, default=1_000_000,
+                                help='skip the slow reference implementation above this many rows')
+    categorize_cmd.set_defaults(func=bench_categorize)
+
+    load_cmd = subparsers.add_parser('load', help='load time and peak memory of the chart data loader')
+    load_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV to replicate')
+    load_cmd.add_argument('--scale', type=int, default=200, help='number of copies of the input rows')
+    load_cmd.set_defaults(func=bench_load)
+
+    aggregate_cmd = subparsers.add_parser('aggregate', help='in-memory vs chunked chart aggregation, with parity')
+    aggregate_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV to replicate')
+    aggregate_cmd.add_argument('--scale', type=int, default=200, help='number of copies of the input rows')
+    aggregate_cmd.add_argument('--chunksizes', type=lambda s: [int(x) for x in s.split(',')],
+                               default=[10_000, 100_000], help='comma-separated chunk sizes in rows')
+    aggregate_cmd.set_defaults(func=bench_aggregate)
+
+    records_cmd = subparsers.add_parser('records', help='memory held by candidate records and CSV write time')
+    records_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV to draw field values from')
+    records_cmd.add_argument('--rows', type=int, default=1_000_000, help='number of candidates to hold')
+    records_cmd.set_defaults(func=bench_records)
+
+    replay_cmd = subparsers.add_parser('replay', help='archive size and offline re-parse throughput')
+    replay_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV used to synthesize pages')
+    replay_cmd.add_argument('--pages', type=int, default=150, help='number of synthetic pages')
+    replay_cmd.add_argument('--codec', default='gzip', choices=('gzip', 'zstd'), help='archive compression')
+    replay_cmd.add_argument('--backend', default=DEFAULT_PARSE_BACKEND, choices=PARSE_BACKENDS, help='parser backend')
+    replay_cmd.add_argument('--workers', type=lambda v: [int(n) for n in v.split(',')],
+                            default=[1, os.cpu_count() or 1], help='comma-separated parse worker counts')
+    replay_cmd.set_defaults(func=bench_replay)
+
+    e2e_cmd = subparsers.add_parser('e2e', help='full scrape against a local mock ENIC server')
+    e2e_cmd.add_argument('--input', default='kadr_enic_candidates.csv', help='CSV used to synthesize pages')
+    e2e_cmd.add_argument('--pages', type=int, default=150, help='number of pages the server lists')
+    e2e_cmd.add_argument('--latency', type=float, default=0.05, help='mean server latency in seconds')
+    e2e_cmd.add_argument('--jitter', type=float, default=0.02, help='uniform +/- latency jitter in seconds')
+    e2e_cmd.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    e2e_cmd.add_argument('--timeout-rate', type=float, default=0.0, help='fraction of requests that hang past the timeout')
+    e2e_cmd.add_argument('--request-timeout', type=float, default=2.0, help='client timeout in seconds')
+    e2e_cmd.add_argument('--seed', type=int, default=0, help='seed for latency and fault injection')
+    e2e_cmd.add_argument('--backend', default=DEFAULT_PARSE_BACKEND, choices=PARSE_BACKENDS, help='parser backend')
+    e2e_cmd.add_argument('--concurrency', type=int, default=10, help='initial concurrency')
+    e2e_cmd.add_argument('--parse-mode', default='inline', choices=PARSE_MODES,
+                         help='parse on the event loop or in a thread/process pool')
+    e2e_cmd.add_argument('--parse-workers', type=int, help='parse pool size (default: CPU count)')
+    e2e_cmd.add_argument('--cache-dir', help='page cache directory (default: no cache)')
+    e2e_cmd.set_defaults(func=bench_e2e)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,364 +2,927 @@
 """
 Data Analysis and Chart Generation Script for KADR ENIC Candidates
 Generates comprehensive visualizations and insights from candidate data
+
+Importing the module has no side effects; matplotlib and seaborn are only
+loaded once a chart is rendered, so statistics-only runs never load them.
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+from collections import Counter
+import hashlib
+import json
 import os
+import pickle
+import re
+import time
 import warnings
-warnings.filterwarnings('ignore')
-
-# Set style for better-looking charts
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
-
-# Create charts directory
-os.makedirs('charts', exist_ok=True)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, fall back to the C parser and no sidecar
+    pa = pq = None
+
+INPUT_FILE = 'kadr_enic_candidates.csv'
+CHARTS_DIR = 'charts'
+# Aggregates of the last run, keyed by the input's hash, plus the digest of
+# the aggregates each chart was last rendered from; lives in the charts dir
+CACHE_FILENAME = '.aggregate_cache.pkl'
+# Bump whenever compute_aggregates() changes what it returns
+CACHE_VERSION = 1
+DEFAULT_DPI = 300
+# Ages are computed as of this year
+DEFAULT_REFERENCE_YEAR = 2025
+
+_plotting_modules = None
+
+
+def _plotting():
+    """Import matplotlib and seaborn on first use and apply the chart style"""
+    global _plotting_modules
+    if _plotting_modules is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Render to files only, also inside worker processes
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        # Set style for better-looking charts
+        plt.style.use('seaborn-v0_8-darkgrid')
+        sns.set_palette("husl")
+        _plotting_modules = plt, sns
+    return _plotting_modules
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    """Plain-Python form of an aggregate whose repr only depends on its content"""
+    if isinstance(value, pd.DataFrame):
+        return ('frame', value.index.tolist(), value.columns.tolist(), value.values.tolist())
+    if isinstance(value, pd.Series):
+        return ('series', value.index.tolist(), value.values.tolist())
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return sorted((key, _canonical(item)) for key, item in value.items())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def aggregate_digest(*values):
+    """Digest of one or more aggregates, used to decide whether a chart changed"""
+    return hashlib.sha256(repr([_canonical(value) for value in values]).encode('utf-8')).hexdigest()
+
+
+def load_cache(charts_dir=CHARTS_DIR):
+    try:
+        with open(os.path.join(charts_dir, CACHE_FILENAME), 'rb') as f:
+            cache = pickle.load(f)
+        if cache.get('version') == CACHE_VERSION:
+            return cache
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    return {'version': CACHE_VERSION, 'input_hash': None, 'aggregates': None, 'chart_digests': {}}
+
+
+def save_cache(cache, charts_dir=CHARTS_DIR):
+    path = os.path.join(charts_dir, CACHE_FILENAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(cache, f, protocol=4)
+    os.replace(tmp_path, path)
+
+
+# Columns the charts use; the rest (URLs, detailed duplicates) are never loaded
+LOAD_COLUMNS = ['name', 'country', 'university', 'education_level', 'specialization', 'birth_date']
+LOAD_DTYPES = {column: 'category' for column in ['country', 'university', 'education_level', 'specialization']}
+SIDECAR_HASH_KEY = b'kadr_enic_source_sha256'
+
+# Specialization categories in priority order: the first category with a
+# keyword contained in the lower-cased specialization wins
+SPECIALIZATION_CATEGORIES = [
+    ('IT & Computer Science', ['kompüter', 'informatik', 'it', 'texnologi', 'proqramlaşdırma']),
+    ('Law', ['hüquq', 'law']),
+    ('Business & Economics', ['iqtisad', 'biznes', 'menec', 'maliyyə', 'economy', 'finance']),
+    ('Medicine & Health', ['tibb', 'müalicə', 'stomatolo', 'bacı', 'medical', 'health']),
+    ('Engineering', ['mühəndis', 'engineer', 'texnik']),
+    ('Languages & Linguistics', ['dil', 'language', 'linqvistik']),
+    ('Psychology & Education', ['psixolog', 'pedaqo', 'təhsil', 'psychology', 'education']),
+    ('Public Administration', ['dövlət', 'idarə', 'government', 'administration']),
+]
+
+
+class SpecializationCategorizer:
+    """Maps specializations to categories with one precompiled regex per category.
+
+    categorize_series() classifies each distinct value once and maps the
+    labels back to the rows, so the cost scales with the number of unique
+    specializations rather than the number of rows.
+    """
+
+    def __init__(self, categories=SPECIALIZATION_CATEGORIES, default='Other'):
+        self.categories = [(name, list(keywords)) for name, keywords in categories]
+        self.default = default
+        self._patterns = [(name, re.compile('|'.join(re.escape(k.lower()) for k in keywords)))
+                          for name, keywords in self.categories if keywords]
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a keyword table: a JSON object of category -> keywords, in priority order"""
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        return cls(list(table.items()))
+
+    def categorize(self, spec):
+        spec_lower = str(spec).lower()
+        for name, pattern in self._patterns:
+            if pattern.search(spec_lower):
+                return name
+        return self.default
+
+    def categorize_series(self, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        labels = np.array([self.categorize(value) for value in uniques], dtype=object)
+        return pd.Series(labels[codes], index=series.index, name=series.name)
+
+    def digest(self):
+        return hashlib.sha256(repr((self.categories, self.default)).encode('utf-8')).hexdigest()
+
+
+DEFAULT_CATEGORIZER = SpecializationCategorizer()
 
-print("Loading data...")
-# Load the CSV data
-df = pd.read_csv('kadr_enic_candidates.csv')
 
-# Clean data - remove rows with missing critical information
-df_clean = df[df['name'] != '--'].copy()
-df_clean = df_clean[df_clean['country'] != '--'].copy()
-
-print(f"Total records: {len(df)}")
-print(f"Valid records: {len(df_clean)}")
-print(f"Records with missing data: {len(df) - len(df_clean)}")
+# Categorize specializations
+def categorize_specialization(spec):
+    return DEFAULT_CATEGORIZER.categorize(spec)
+
+
+def value_counts(series):
+    """Count values, most frequent first, ties in order of first appearance.
+
+    Matches Series.value_counts() on plain strings, and gives the same
+    result for categoricals instead of listing unused categories and
+    breaking ties by category order.
+    """
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(-counts, kind='stable')
+    return pd.Series(counts[order], index=pd.Index(np.asarray(uniques, dtype=object)[order], name=series.name),
+                     name='count')
+
+
+def clean_frame(df, reference_year=DEFAULT_REFERENCE_YEAR):
+    """Drop rows without a name or country and add birth_year and age columns"""
+    # Clean data - remove rows with missing critical information
+    df_clean = df[(df['name'] != '--') & (df['country'] != '--')].copy()
+
+    # Parse birth dates
+    df_clean['birth_date'] = pd.to_datetime(df_clean['birth_date'], format='%d.%m.%Y', errors='coerce')
+    df_clean['birth_year'] = df_clean['birth_date'].dt.year
+    df_clean['age'] = reference_year - df_clean['birth_year']
+    return df_clean
+
+
+def valid_ages(df_clean):
+    # Remove outliers and invalid ages
+    age_data = df_clean['age'].dropna()
+    return age_data[(age_data >= 18) & (age_data <= 80)]
+
+
+def valid_birth_years(df_clean):
+    # Filter valid birth years
+    birth_year_data = df_clean['birth_year'].dropna()
+    return birth_year_data[(birth_year_data >= 1950) & (birth_year_data <= 2010)]
+
+
+def compute_aggregates(df, categorizer=DEFAULT_CATEGORIZER, reference_year=DEFAULT_REFERENCE_YEAR):
+    """Compute everything the charts and the summary need from the raw frame"""
+    df_clean = clean_frame(df, reference_year)
+
+    age_data = valid_ages(df_clean)
+    age_counts, age_edges = np.histogram(age_data, bins=25)
+
+    birth_year_data = valid_birth_years(df_clean)
+
+    # Get top 10 countries
+    top_countries = value_counts(df_clean['country']).head(10).index
+    df_top_countries = df_clean[df_clean['country'].isin(top_countries)]
+
+    df_clean['spec_category'] = categorizer.categorize_series(df_clean['specialization'])
+
+    return {
+        'valid_records': len(df_clean),
+        'summary': {
+            'total_records': len(df),
+            'countries': df_clean['country'].nunique(),
+            'universities': df_clean['university'].nunique(),
+            'specializations': df_clean['specialization'].nunique(),
+        },
+        'country_counts': value_counts(df_clean['country']).head(15),
+        'education_counts': value_counts(df_clean['education_level']),
+        'spec_counts': value_counts(df_clean['specialization']).head(15),
+        'age_histogram': {
+            'counts': age_counts,
+            'edges': age_edges,
+            'mean': age_data.mean(),
+            'median': age_data.median(),
+            'min': age_data.min(),
+            'max': age_data.max(),
+        },
+        'uni_counts': value_counts(df_clean['university']).head(15),
+        'birth_year_counts': birth_year_data.value_counts().sort_index(),
+        # Create cross-tabulation
+        'country_edu_crosstab': pd.crosstab(df_top_countries['country'],
+                                            df_top_countries['education_level']),
+        'category_counts': value_counts(df_clean['spec_category']),
+    }
+
+
+class StreamingAggregator:
+    """Builds the compute_aggregates() result from a sequence of raw chunks.
+
+    Every aggregate is kept in a mergeable form whose size depends on the
+    number of distinct values, not rows: Counters for value counts (keys
+    in order of first appearance, so the final stable sort breaks ties
+    exactly like value_counts() on the whole frame), country x education
+    pair counts for the crosstab, and counts per integer age and birth
+    year, from which the histogram, mean and the exact median follow.
+    """
+
+    COUNTED = ('country', 'education_level', 'specialization', 'university', 'spec_category')
+
+    def __init__(self, categorizer=DEFAULT_CATEGORIZER, reference_year=DEFAULT_REFERENCE_YEAR):
+        self.categorizer = categorizer
+        self.reference_year = reference_year
+        self.total_records = 0
+        self.valid_records = 0
+        self.counts = {column: Counter() for column in self.COUNTED}
+        self.pairs = Counter()
+        self.ages = Counter()
+        self.birth_years = Counter()
+
+    @staticmethod
+    def _count(counter, series):
+        codes, uniques = pd.factorize(series)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        for value, count in zip(uniques, counts.tolist()):
+            counter[value] += count
+
+    def add(self, df):
+        """Accumulate one chunk with the columns of LOAD_COLUMNS"""
+        self.total_records += len(df)
+        df_clean = clean_frame(df, self.reference_year)
+        self.valid_records += len(df_clean)
+        df_clean['spec_category'] = self.categorizer.categorize_series(df_clean['specialization'])
+        for column, counter in self.counts.items():
+            self._count(counter, df_clean[column])
+
+        pairs = df_clean.groupby(['country', 'education_level'], sort=False).size()
+        self.pairs.update(dict(zip(pairs.index, pairs.tolist())))
+        for counter, values in ((self.ages, valid_ages(df_clean)), (self.birth_years, valid_birth_years(df_clean))):
+            counts = values.value_counts(sort=False)
+            counter.update(dict(zip(counts.index.tolist(), counts.tolist())))
+
+    @staticmethod
+    def _series(counter, name):
+        """Counter as a value_counts()-style Series: most frequent first, ties in first-seen order"""
+        items = sorted(counter.items(), key=lambda item: -item[1])
+        return pd.Series([count for _, count in items],
+                         index=pd.Index([value for value, _ in items], dtype=object, name=name), name='count')
+
+    def _age_histogram(self):
+        if not self.ages:
+            # What compute_aggregates() gets from np.histogram and pandas on an empty series
+            counts, edges = np.histogram(np.array([], dtype=np.float64), bins=25)
+            return {'counts': counts, 'edges': edges, 'mean': np.nan, 'median': np.nan, 'min': np.nan,
+                    'max': np.nan}
+        ages = sorted(self.ages)
+        counts = np.array([self.ages[age] for age in ages], dtype=np.int64)
+        values = np.array(ages, dtype=np.float64)
+        hist_counts, edges = np.histogram(values, bins=25, range=(values.min(), values.max()), weights=counts)
+        total = int(counts.sum())
+        # Exact median from the cumulative counts: middle value, or the mean of the two middle values
+        cumulative = np.cumsum(counts)
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+        return {
+            'counts': hist_counts.astype(np.int64),
+            'edges': edges,
+            'mean': sum(age * count for age, count in self.ages.items()) / total,
+            'median': (lower + upper) / 2,
+            'min': values.min(),
+            'max': values.max(),
+        }
+
+    def _crosstab(self, country_counts):
+        top_countries = sorted(country_counts.head(10).index)
+        top = set(top_countries)
+        levels = sorted({level for country, level in self.pairs if country in top})
+        table = [[self.pairs.get((country, level), 0) for level in levels] for country in top_countries]
+        return pd.DataFrame(np.array(table, dtype=np.int64).reshape(len(top_countries), len(levels)),
+                            index=pd.Index(top_countries, name='country'),
+                            columns=pd.Index(levels, name='education_level'))
+
+    def result(self):
+        country_counts = self._series(self.counts['country'], 'country')
+        birth_years = sorted(self.birth_years)
+        return {
+            'valid_records': self.valid_records,
+            'summary': {
+                'total_records': self.total_records,
+                'countries': len(self.counts['country']),
+                'universities': len(self.counts['university']),
+                'specializations': len(self.counts['specialization']),
+            },
+            'country_counts': country_counts.head(15),
+            'education_counts': self._series(self.counts['education_level'], 'education_level'),
+            'spec_counts': self._series(self.counts['specialization'], 'specialization').head(15),
+            'age_histogram': self._age_histogram(),
+            'uni_counts': self._series(self.counts['university'], 'university').head(15),
+            # An empty index would be object dtype, which matplotlib cannot plot; years are numeric
+            'birth_year_counts': pd.Series([self.birth_years[year] for year in birth_years], dtype=np.int64,
+                                           index=pd.Index(birth_years, name='birth_year',
+                                                          dtype=None if birth_years else np.float64),
+                                           name='count'),
+            'country_edu_crosstab': self._crosstab(country_counts),
+            'category_counts': self._series(self.counts['spec_category'], 'spec_category'),
+        }
+
+
+def iter_chunks(path, chunksize, columns=LOAD_COLUMNS):
+    """Read only the needed columns of a CSV in chunks of chunksize rows"""
+    return pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def compute_aggregates_chunked(path, chunksize, categorizer=DEFAULT_CATEGORIZER,
+                               reference_year=DEFAULT_REFERENCE_YEAR, normalizer=None):
+    """compute_aggregates() for a CSV of any size, holding one chunk at a time.
+
+    With a normalizer, a first pass counts the name columns of the whole
+    file and learns them in one go, as apply_name_mapping() would, so
+    every chunk is mapped to the same canonical names.
+    """
+    if normalizer is not None:
+        from normalize import NORMALIZED_FIELDS
+        totals = {field: Counter() for field in NORMALIZED_FIELDS}
+        for chunk in iter_chunks(path, chunksize, list(NORMALIZED_FIELDS)):
+            for field, counter in totals.items():
+                StreamingAggregator._count(counter, chunk[field])
+        for field, counter in totals.items():
+            # In name order, like the sorted categories apply_name_mapping() sees, so ties resolve the same way
+            normalizer.learn_counts(field, dict(sorted(counter.items())))
+
+    aggregator = StreamingAggregator(categorizer, reference_year)
+    for chunk in iter_chunks(path, chunksize):
+        if normalizer is not None:
+            chunk = apply_name_mapping(chunk, normalizer, learn=False)
+        aggregator.add(chunk)
+    return aggregator.result()
 
-# Parse birth dates
-df_clean['birth_date'] = pd.to_datetime(df_clean['birth_date'], format='%d.%m.%Y', errors='coerce')
-df_clean['birth_year'] = df_clean['birth_date'].dt.year
-df_clean['age'] = 2025 - df_clean['birth_year']
 
 # ============================================================================
 # CHART 1: Distribution by Country (Top 15)
 # ============================================================================
-print("\nGenerating Chart 1: Distribution by Country...")
-plt.figure(figsize=(14, 8))
-country_counts = df_clean['country'].value_counts().head(15)
+def render_country_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 8))
+    country_counts = agg['country_counts']
+
+    colors = sns.color_palette("viridis", len(country_counts))
+    bars = plt.bar(range(len(country_counts)), country_counts.values, color=colors, edgecolor='black', linewidth=1.2)
 
-colors = sns.color_palette("viridis", len(country_counts))
-bars = plt.bar(range(len(country_counts)), country_counts.values, color=colors, edgecolor='black', linewidth=1.2)
+    plt.xlabel('Country', fontsize=14, fontweight='bold')
+    plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
+    plt.title('Top 15 Countries by Number of Candidates', fontsize=16, fontweight='bold', pad=20)
+    plt.xticks(range(len(country_counts)), country_counts.index, rotation=45, ha='right', fontsize=11)
+    plt.yticks(fontsize=11)
 
-plt.xlabel('Country', fontsize=14, fontweight='bold')
-plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
-plt.title('Top 15 Countries by Number of Candidates', fontsize=16, fontweight='bold', pad=20)
-plt.xticks(range(len(country_counts)), country_counts.index, rotation=45, ha='right', fontsize=11)
-plt.yticks(fontsize=11)
+    # Add value labels on bars
+    for i, (bar, value) in enumerate(zip(bars, country_counts.values)):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
+                 f'{int(value)}', ha='center', va='bottom', fontsize=10, fontweight='bold')
 
-# Add value labels on bars
-for i, (bar, value) in enumerate(zip(bars, country_counts.values)):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
-             f'{int(value)}', ha='center', va='bottom', fontsize=10, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-plt.tight_layout()
-plt.savefig('charts/01_distribution_by_country.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/01_distribution_by_country.png")
 
 # ============================================================================
 # CHART 2: Distribution by Education Level
 # ============================================================================
-print("\nGenerating Chart 2: Distribution by Education Level...")
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
-
-education_counts = df_clean['education_level'].value_counts()
-
-# Left: Horizontal Bar Chart
-colors_bar = sns.color_palette("viridis", len(education_counts))
-bars = ax1.barh(range(len(education_counts)), education_counts.values,
-                color=colors_bar, edgecolor='black', linewidth=1.5)
-
-ax1.set_xlabel('Number of Candidates', fontsize=13, fontweight='bold')
-ax1.set_ylabel('Education Level', fontsize=13, fontweight='bold')
-ax1.set_title('Education Level Distribution (Count)', fontsize=15, fontweight='bold', pad=15)
-ax1.set_yticks(range(len(education_counts)))
-ax1.set_yticklabels(education_counts.index, fontsize=11)
-ax1.tick_params(axis='x', labelsize=11)
-ax1.grid(axis='x', alpha=0.3, linestyle='--')
-
-# Add value labels and percentages on bars
-for i, (bar, value) in enumerate(zip(bars, education_counts.values)):
-    percentage = (value / len(df_clean)) * 100
-    ax1.text(bar.get_width() + 10, bar.get_y() + bar.get_height()/2,
-             f'{int(value)} ({percentage:.1f}%)',
-             ha='left', va='center', fontsize=11, fontweight='bold')
-
-ax1.invert_yaxis()
-
-# Right: Pie Chart with better formatting
-colors_pie = sns.color_palette("Set2", len(education_counts))
-wedges, texts, autotexts = ax2.pie(education_counts.values,
-                                     labels=None,
-                                     autopct='%1.1f%%',
-                                     startangle=90,
-                                     colors=colors_pie,
-                                     textprops={'fontsize': 11, 'fontweight': 'bold'},
-                                     explode=[0.05] * len(education_counts),
-                                     pctdistance=0.85)
-
-# Make percentage text more visible
-for autotext in autotexts:
-    autotext.set_color('white')
-    autotext.set_fontsize(12)
-    autotext.set_fontweight('bold')
-
-ax2.set_title('Education Level Distribution (Percentage)', fontsize=15, fontweight='bold', pad=15)
-
-# Add legend outside the pie chart
-ax2.legend(wedges, education_counts.index,
-          title="Education Levels",
-          loc="center left",
-          bbox_to_anchor=(1, 0, 0.5, 1),
-          fontsize=10)
-
-plt.tight_layout()
-plt.savefig('charts/02_distribution_by_education_level.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/02_distribution_by_education_level.png")
+def render_education_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
+
+    education_counts = agg['education_counts']
+    valid_records = agg['valid_records']
+
+    # Left: Horizontal Bar Chart
+    colors_bar = sns.color_palette("viridis", len(education_counts))
+    bars = ax1.barh(range(len(education_counts)), education_counts.values,
+                    color=colors_bar, edgecolor='black', linewidth=1.5)
+
+    ax1.set_xlabel('Number of Candidates', fontsize=13, fontweight='bold')
+    ax1.set_ylabel('Education Level', fontsize=13, fontweight='bold')
+    ax1.set_title('Education Level Distribution (Count)', fontsize=15, fontweight='bold', pad=15)
+    ax1.set_yticks(range(len(education_counts)))
+    ax1.set_yticklabels(education_counts.index, fontsize=11)
+    ax1.tick_params(axis='x', labelsize=11)
+    ax1.grid(axis='x', alpha=0.3, linestyle='--')
+
+    # Add value labels and percentages on bars
+    for i, (bar, value) in enumerate(zip(bars, education_counts.values)):
+        percentage = (value / valid_records) * 100
+        ax1.text(bar.get_width() + 10, bar.get_y() + bar.get_height()/2,
+                 f'{int(value)} ({percentage:.1f}%)',
+                 ha='left', va='center', fontsize=11, fontweight='bold')
+
+    ax1.invert_yaxis()
+
+    # Right: Pie Chart with better formatting
+    colors_pie = sns.color_palette("Set2", len(education_counts))
+    wedges, texts, autotexts = ax2.pie(education_counts.values,
+                                         labels=None,
+                                         autopct='%1.1f%%',
+                                         startangle=90,
+                                         colors=colors_pie,
+                                         textprops={'fontsize': 11, 'fontweight': 'bold'},
+                                         explode=[0.05] * len(education_counts),
+                                         pctdistance=0.85)
+
+    # Make percentage text more visible
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontsize(12)
+        autotext.set_fontweight('bold')
+
+    ax2.set_title('Education Level Distribution (Percentage)', fontsize=15, fontweight='bold', pad=15)
+
+    # Add legend outside the pie chart
+    ax2.legend(wedges, education_counts.index,
+              title="Education Levels",
+              loc="center left",
+              bbox_to_anchor=(1, 0, 0.5, 1),
+              fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
 
 # ============================================================================
 # CHART 3: Top 15 Specializations
 # ============================================================================
-print("\nGenerating Chart 3: Top 15 Specializations...")
-plt.figure(figsize=(14, 10))
-spec_counts = df_clean['specialization'].value_counts().head(15)
-
-colors = sns.color_palette("rocket", len(spec_counts))
-bars = plt.barh(range(len(spec_counts)), spec_counts.values, color=colors, edgecolor='black', linewidth=1.2)
-
-plt.ylabel('Specialization', fontsize=14, fontweight='bold')
-plt.xlabel('Number of Candidates', fontsize=14, fontweight='bold')
-plt.title('Top 15 Most Popular Specializations', fontsize=16, fontweight='bold', pad=20)
-plt.yticks(range(len(spec_counts)), spec_counts.index, fontsize=11)
-plt.xticks(fontsize=11)
-
-# Add value labels on bars
-for i, (bar, value) in enumerate(zip(bars, spec_counts.values)):
-    plt.text(bar.get_width() + 2, bar.get_y() + bar.get_height()/2,
-             f'{int(value)}', ha='left', va='center', fontsize=10, fontweight='bold')
-
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig('charts/03_top_specializations.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/03_top_specializations.png")
+def render_specialization_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 10))
+    spec_counts = agg['spec_counts']
+
+    colors = sns.color_palette("rocket", len(spec_counts))
+    bars = plt.barh(range(len(spec_counts)), spec_counts.values, color=colors, edgecolor='black', linewidth=1.2)
+
+    plt.ylabel('Specialization', fontsize=14, fontweight='bold')
+    plt.xlabel('Number of Candidates', fontsize=14, fontweight='bold')
+    plt.title('Top 15 Most Popular Specializations', fontsize=16, fontweight='bold', pad=20)
+    plt.yticks(range(len(spec_counts)), spec_counts.index, fontsize=11)
+    plt.xticks(fontsize=11)
+
+    # Add value labels on bars
+    for i, (bar, value) in enumerate(zip(bars, spec_counts.values)):
+        plt.text(bar.get_width() + 2, bar.get_y() + bar.get_height()/2,
+                 f'{int(value)}', ha='left', va='center', fontsize=10, fontweight='bold')
+
+    plt.gca().invert_yaxis()
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
 
 # ============================================================================
 # CHART 4: Age Distribution
 # ============================================================================
-print("\nGenerating Chart 4: Age Distribution...")
-plt.figure(figsize=(14, 8))
-
-# Remove outliers and invalid ages
-age_data = df_clean['age'].dropna()
-age_data = age_data[(age_data >= 18) & (age_data <= 80)]
-
-plt.hist(age_data, bins=25, color='skyblue', edgecolor='black', linewidth=1.2, alpha=0.8)
-plt.axvline(age_data.mean(), color='red', linestyle='--', linewidth=2, label=f'Mean Age: {age_data.mean():.1f}')
-plt.axvline(age_data.median(), color='green', linestyle='--', linewidth=2, label=f'Median Age: {age_data.median():.1f}')
-
-plt.xlabel('Age (years)', fontsize=14, fontweight='bold')
-plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
-plt.title('Age Distribution of Candidates', fontsize=16, fontweight='bold', pad=20)
-plt.legend(fontsize=12)
-plt.grid(axis='y', alpha=0.5)
-plt.xticks(fontsize=11)
-plt.yticks(fontsize=11)
-
-plt.tight_layout()
-plt.savefig('charts/04_age_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/04_age_distribution.png")
+def render_age_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 8))
+
+    # Redraw the precomputed histogram: one weighted sample per bin
+    age = agg['age_histogram']
+    plt.hist(age['edges'][:-1], bins=age['edges'], weights=age['counts'],
+             color='skyblue', edgecolor='black', linewidth=1.2, alpha=0.8)
+    plt.axvline(age['mean'], color='red', linestyle='--', linewidth=2, label=f"Mean Age: {age['mean']:.1f}")
+    plt.axvline(age['median'], color='green', linestyle='--', linewidth=2, label=f"Median Age: {age['median']:.1f}")
+
+    plt.xlabel('Age (years)', fontsize=14, fontweight='bold')
+    plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
+    plt.title('Age Distribution of Candidates', fontsize=16, fontweight='bold', pad=20)
+    plt.legend(fontsize=12)
+    plt.grid(axis='y', alpha=0.5)
+    plt.xticks(fontsize=11)
+    plt.yticks(fontsize=11)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
 
 # ============================================================================
 # CHART 5: Top 15 Universities
 # ============================================================================
-print("\nGenerating Chart 5: Top 15 Universities...")
-plt.figure(figsize=(14, 10))
-uni_counts = df_clean['university'].value_counts().head(15)
-
-colors = sns.color_palette("mako", len(uni_counts))
-bars = plt.barh(range(len(uni_counts)), uni_counts.values, color=colors, edgecolor='black', linewidth=1.2)
-
-plt.ylabel('University', fontsize=14, fontweight='bold')
-plt.xlabel('Number of Candidates', fontsize=14, fontweight='bold')
-plt.title('Top 15 Universities by Number of Candidates', fontsize=16, fontweight='bold', pad=20)
-plt.yticks(range(len(uni_counts)), uni_counts.index, fontsize=10)
-plt.xticks(fontsize=11)
-
-# Add value labels on bars
-for i, (bar, value) in enumerate(zip(bars, uni_counts.values)):
-    plt.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2,
-             f'{int(value)}', ha='left', va='center', fontsize=10, fontweight='bold')
-
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.savefig('charts/05_top_universities.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/05_top_universities.png")
+def render_university_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 10))
+    uni_counts = agg['uni_counts']
+
+    colors = sns.color_palette("mako", len(uni_counts))
+    bars = plt.barh(range(len(uni_counts)), uni_counts.values, color=colors, edgecolor='black', linewidth=1.2)
+
+    plt.ylabel('University', fontsize=14, fontweight='bold')
+    plt.xlabel('Number of Candidates', fontsize=14, fontweight='bold')
+    plt.title('Top 15 Universities by Number of Candidates', fontsize=16, fontweight='bold', pad=20)
+    plt.yticks(range(len(uni_counts)), uni_counts.index, fontsize=10)
+    plt.xticks(fontsize=11)
+
+    # Add value labels on bars
+    for i, (bar, value) in enumerate(zip(bars, uni_counts.values)):
+        plt.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2,
+                 f'{int(value)}', ha='left', va='center', fontsize=10, fontweight='bold')
+
+    plt.gca().invert_yaxis()
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
 
 # ============================================================================
 # CHART 6: Birth Year Trends
 # ============================================================================
-print("\nGenerating Chart 6: Birth Year Trends...")
-plt.figure(figsize=(14, 8))
-
-# Filter valid birth years
-birth_year_data = df_clean['birth_year'].dropna()
-birth_year_data = birth_year_data[(birth_year_data >= 1950) & (birth_year_data <= 2010)]
-birth_year_counts = birth_year_data.value_counts().sort_index()
-
-plt.plot(birth_year_counts.index, birth_year_counts.values,
-         marker='o', linewidth=2.5, markersize=6, color='darkblue', alpha=0.7)
-plt.fill_between(birth_year_counts.index, birth_year_counts.values, alpha=0.3, color='lightblue')
-
-plt.xlabel('Birth Year', fontsize=14, fontweight='bold')
-plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
-plt.title('Candidate Distribution by Birth Year', fontsize=16, fontweight='bold', pad=20)
-plt.grid(True, alpha=0.5)
-plt.xticks(fontsize=11)
-plt.yticks(fontsize=11)
-
-plt.tight_layout()
-plt.savefig('charts/06_birth_year_trends.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/06_birth_year_trends.png")
+def render_birth_year_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 8))
+
+    birth_year_counts = agg['birth_year_counts']
+
+    plt.plot(birth_year_counts.index, birth_year_counts.values,
+             marker='o', linewidth=2.5, markersize=6, color='darkblue', alpha=0.7)
+    plt.fill_between(birth_year_counts.index, birth_year_counts.values, alpha=0.3, color='lightblue')
+
+    plt.xlabel('Birth Year', fontsize=14, fontweight='bold')
+    plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
+    plt.title('Candidate Distribution by Birth Year', fontsize=16, fontweight='bold', pad=20)
+    plt.grid(True, alpha=0.5)
+    plt.xticks(fontsize=11)
+    plt.yticks(fontsize=11)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
 
 # ============================================================================
 # CHART 7: Country vs Education Level (Heatmap for Top 10 Countries)
 # ============================================================================
-print("\nGenerating Chart 7: Country vs Education Level Heatmap...")
-plt.figure(figsize=(14, 10))
-
-# Get top 10 countries
-top_countries = df_clean['country'].value_counts().head(10).index
-df_top_countries = df_clean[df_clean['country'].isin(top_countries)]
+def render_heatmap_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 10))
 
-# Create cross-tabulation
-country_edu_crosstab = pd.crosstab(df_top_countries['country'],
-                                    df_top_countries['education_level'])
+    # Create heatmap
+    sns.heatmap(agg['country_edu_crosstab'], annot=True, fmt='d', cmap='YlOrRd',
+                linewidths=0.5, cbar_kws={'label': 'Number of Candidates'})
 
-# Create heatmap
-sns.heatmap(country_edu_crosstab, annot=True, fmt='d', cmap='YlOrRd',
-            linewidths=0.5, cbar_kws={'label': 'Number of Candidates'})
+    plt.xlabel('Education Level', fontsize=14, fontweight='bold')
+    plt.ylabel('Country', fontsize=14, fontweight='bold')
+    plt.title('Top 10 Countries vs Education Level Distribution', fontsize=16, fontweight='bold', pad=20)
+    plt.xticks(rotation=45, ha='right', fontsize=11)
+    plt.yticks(rotation=0, fontsize=11)
 
-plt.xlabel('Education Level', fontsize=14, fontweight='bold')
-plt.ylabel('Country', fontsize=14, fontweight='bold')
-plt.title('Top 10 Countries vs Education Level Distribution', fontsize=16, fontweight='bold', pad=20)
-plt.xticks(rotation=45, ha='right', fontsize=11)
-plt.yticks(rotation=0, fontsize=11)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-plt.tight_layout()
-plt.savefig('charts/07_country_education_heatmap.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/07_country_education_heatmap.png")
 
 # ============================================================================
 # CHART 8: Specialization Categories (Grouped)
 # ============================================================================
-print("\nGenerating Chart 8: Specialization Categories...")
-plt.figure(figsize=(14, 8))
-
-# Categorize specializations
-def categorize_specialization(spec):
-    spec_lower = str(spec).lower()
-    if any(word in spec_lower for word in ['kompüter', 'informatik', 'it', 'texnologi', 'proqramlaşdırma']):
-        return 'IT & Computer Science'
-    elif any(word in spec_lower for word in ['hüquq', 'law']):
-        return 'Law'
-    elif any(word in spec_lower for word in ['iqtisad', 'biznes', 'menec', 'maliyyə', 'economy', 'finance']):
-        return 'Business & Economics'
-    elif any(word in spec_lower for word in ['tibb', 'müalicə', 'stomatolo', 'bacı', 'medical', 'health']):
-        return 'Medicine & Health'
-    elif any(word in spec_lower for word in ['mühəndis', 'engineer', 'texnik']):
-        return 'Engineering'
-    elif any(word in spec_lower for word in ['dil', 'language', 'linqvistik']):
-        return 'Languages & Linguistics'
-    elif any(word in spec_lower for word in ['psixolog', 'pedaqo', 'təhsil', 'psychology', 'education']):
-        return 'Psychology & Education'
-    elif any(word in spec_lower for word in ['dövlət', 'idarə', 'government', 'administration']):
-        return 'Public Administration'
+def render_category_chart(agg, path, dpi=DEFAULT_DPI):
+    plt, sns = _plotting()
+    plt.figure(figsize=(14, 8))
+
+    category_counts = agg['category_counts']
+
+    colors = sns.color_palette("Set2", len(category_counts))
+    bars = plt.bar(range(len(category_counts)), category_counts.values, color=colors, edgecolor='black', linewidth=1.2)
+
+    plt.xlabel('Specialization Category', fontsize=14, fontweight='bold')
+    plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
+    plt.title('Distribution by Specialization Categories', fontsize=16, fontweight='bold', pad=20)
+    plt.xticks(range(len(category_counts)), category_counts.index, rotation=45, ha='right', fontsize=11)
+    plt.yticks(fontsize=11)
+
+    # Add value labels on bars
+    for bar, value in zip(bars, category_counts.values):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
+                 f'{int(value)}', ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+# (file name, title, render function, aggregates the chart is drawn from)
+CHARTS = [
+    ('01_distribution_by_country.png', 'Distribution by Country',
+     render_country_chart, ('country_counts',)),
+    ('02_distribution_by_education_level.png', 'Distribution by Education Level',
+     render_education_chart, ('education_counts', 'valid_records')),
+    ('03_top_specializations.png', 'Top 15 Specializations',
+     render_specialization_chart, ('spec_counts',)),
+    ('04_age_distribution.png', 'Age Distribution',
+     render_age_chart, ('age_histogram',)),
+    ('05_top_universities.png', 'Top 15 Universities',
+     render_university_chart, ('uni_counts',)),
+    ('06_birth_year_trends.png', 'Birth Year Trends',
+     render_birth_year_chart, ('birth_year_counts',)),
+    ('07_country_education_heatmap.png', 'Country vs Education Level Heatmap',
+     render_heatmap_chart, ('country_edu_crosstab',)),
+    ('08_specialization_categories.png', 'Specialization Categories',
+     render_category_chart, ('category_counts',)),
+]
+CHART_RENDERERS = {filename: render for filename, _, render, _ in CHARTS}
+
+
+def _render_chart(filename, aggregates, path, dpi=DEFAULT_DPI):
+    """Render one chart, returning its name and the seconds it took (process pool entry point)"""
+    render = CHART_RENDERERS[filename]
+    start = time.perf_counter()
+    render(aggregates, path, dpi)
+    return filename, time.perf_counter() - start
+
+
+def select_charts(names):
+    """Resolve chart numbers ('4') or file names with or without .png to CHARTS file names"""
+    selected = []
+    for name in names:
+        name = name.strip()
+        for number, (filename, _, _, _) in enumerate(CHARTS, 1):
+            if name in (str(number), f"{number:02d}", filename, os.path.splitext(filename)[0]):
+                selected.append(filename)
+                break
+        else:
+            raise ValueError(f"Unknown chart {name!r}, expected 1-{len(CHARTS)} or a chart file name")
+    return selected
+
+
+def sidecar_path(path):
+    return f"{os.path.splitext(path)[0]}.parquet"
+
+
+def load_candidates(path, source_hash=None):
+    """Load only the columns the charts use, with categoricals for repeated text.
+
+    Uses the pyarrow CSV engine when pyarrow is installed and writes a
+    Parquet sidecar tagged with the CSV's hash, which later runs read
+    directly while the CSV is unchanged.
+    """
+    source_hash = source_hash or file_hash(path)
+    sidecar = sidecar_path(path)
+    if pq is not None and os.path.exists(sidecar):
+        try:
+            metadata = pq.read_schema(sidecar).metadata or {}
+            if metadata.get(SIDECAR_HASH_KEY) == source_hash.encode('ascii'):
+                return pd.read_parquet(sidecar)
+        except (OSError, pa.ArrowException):
+            pass
+
+    df = pd.read_csv(path, usecols=LOAD_COLUMNS, dtype=LOAD_DTYPES,
+                     engine='pyarrow' if pa is not None else 'c')
+
+    if pq is not None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SIDECAR_HASH_KEY: source_hash})
+        tmp_path = f"{sidecar}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, sidecar)
+    return df
+
+
+def apply_name_mapping(df, normalizer, learn=True):
+    """Replace university and country values with their canonical names from a normalize.NameNormalizer.
+
+    Works on the distinct values only; with learn, names the mapping has
+    not seen are learned (and clustered) with their counts first.
+    """
+    from normalize import NORMALIZED_FIELDS
+    for field in NORMALIZED_FIELDS:
+        counts = df[field].value_counts(sort=False)
+        if learn:
+            normalizer.learn_counts(field, {name: int(count) for name, count in counts.items() if count})
+        mapping = {name: normalizer.canonical(field, name) for name in counts.index}
+        df[field] = df[field].map(mapping).astype('category')
+    return df
+
+
+def load_aggregates(cache, input_file=INPUT_FILE, categorizer=DEFAULT_CATEGORIZER,
+                    reference_year=DEFAULT_REFERENCE_YEAR, normalizer=None, chunksize=None):
+    """Return the aggregates for input_file, recomputing them only if it or the settings changed.
+
+    With a chunksize the file is streamed instead of loaded whole.
+    """
+    csv_hash = file_hash(input_file)
+    input_hash = f"{csv_hash}:{categorizer.digest()}:{reference_year}"
+    if normalizer is not None:
+        input_hash += f":{normalizer.digest()}"
+    if cache['input_hash'] == input_hash and cache['aggregates'] is not None:
+        print("Input unchanged, using cached aggregates...")
+        return cache['aggregates']
+
+    if chunksize:
+        print(f"Streaming data in chunks of {chunksize} rows...")
+        aggregates = compute_aggregates_chunked(input_file, chunksize, categorizer, reference_year, normalizer)
     else:
-        return 'Other'
-
-df_clean['spec_category'] = df_clean['specialization'].apply(categorize_specialization)
-category_counts = df_clean['spec_category'].value_counts()
-
-colors = sns.color_palette("Set2", len(category_counts))
-bars = plt.bar(range(len(category_counts)), category_counts.values, color=colors, edgecolor='black', linewidth=1.2)
-
-plt.xlabel('Specialization Category', fontsize=14, fontweight='bold')
-plt.ylabel('Number of Candidates', fontsize=14, fontweight='bold')
-plt.title('Distribution by Specialization Categories', fontsize=16, fontweight='bold', pad=20)
-plt.xticks(range(len(category_counts)), category_counts.index, rotation=45, ha='right', fontsize=11)
-plt.yticks(fontsize=11)
+        print("Loading data...")
+        df = load_candidates(input_file, source_hash=csv_hash)
+        if normalizer is not None:
+            df = apply_name_mapping(df, normalizer)
+        aggregates = compute_aggregates(df, categorizer, reference_year)
+    if normalizer is not None:
+        normalizer.save()
+    cache['input_hash'] = input_hash
+    cache['aggregates'] = aggregates
+    return aggregates
+
+
+def render_charts(aggregates, cache, charts_dir=CHARTS_DIR, jobs=1, charts=None, dpi=DEFAULT_DPI):
+    """Render the charts (all, or the given file names) whose aggregates changed.
+
+    Renders in a process pool if jobs > 1.
+    """
+    pending = {}
+    for number, (filename, title, render, keys) in enumerate(CHARTS, 1):
+        if charts is not None and filename not in charts:
+            continue
+        path = os.path.join(charts_dir, filename)
+        digest = aggregate_digest(*(aggregates[key] for key in keys), dpi)
+        if cache['chart_digests'].get(filename) == digest and os.path.exists(path):
+            print(f"\nChart {number}: {title} unchanged, skipping")
+            continue
+        print(f"\nGenerating Chart {number}: {title}...")
+        # Workers only receive the aggregates their chart is drawn from
+        pending[filename] = (digest, path, {key: aggregates[key] for key in keys})
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            futures = [executor.submit(_render_chart, filename, chart_aggregates, path, dpi)
+                       for filename, (digest, path, chart_aggregates) in pending.items()]
+            results = [future.result() for future in as_completed(futures)]
+    else:
+        results = [_render_chart(filename, chart_aggregates, path, dpi)
+                   for filename, (digest, path, chart_aggregates) in pending.items()]
 
-# Add value labels on bars
-for bar, value in zip(bars, category_counts.values):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
-             f'{int(value)}', ha='center', va='bottom', fontsize=11, fontweight='bold')
+    for filename, elapsed in results:
+        digest, path, _ = pending[filename]
+        cache['chart_digests'][filename] = digest
+        print(f"✓ Saved: {path} ({elapsed:.2f}s)")
 
-plt.tight_layout()
-plt.savefig('charts/08_specialization_categories.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("✓ Saved: charts/08_specialization_categories.png")
 
 # ============================================================================
 # Generate Summary Statistics
 # ============================================================================
-print("\n" + "="*80)
-print("SUMMARY STATISTICS")
-print("="*80)
-
-print(f"\nTotal Candidates: {len(df_clean)}")
-print(f"Number of Countries: {df_clean['country'].nunique()}")
-print(f"Number of Universities: {df_clean['university'].nunique()}")
-print(f"Number of Specializations: {df_clean['specialization'].nunique()}")
-
-print("\n--- Age Statistics ---")
-print(f"Mean Age: {age_data.mean():.1f} years")
-print(f"Median Age: {age_data.median():.1f} years")
-print(f"Age Range: {age_data.min():.0f} - {age_data.max():.0f} years")
-
-print("\n--- Top 5 Countries ---")
-for i, (country, count) in enumerate(country_counts.head(5).items(), 1):
-    percentage = (count / len(df_clean)) * 100
-    print(f"{i}. {country}: {count} ({percentage:.1f}%)")
-
-print("\n--- Education Level Distribution ---")
-for level, count in education_counts.items():
-    percentage = (count / len(df_clean)) * 100
-    print(f"  {level}: {count} ({percentage:.1f}%)")
-
-print("\n--- Top 5 Specializations ---")
-for i, (spec, count) in enumerate(spec_counts.head(5).items(), 1):
-    percentage = (count / len(df_clean)) * 100
-    print(f"{i}. {spec}: {count} ({percentage:.1f}%)")
-
-print("\n" + "="*80)
-print("✓ All charts generated successfully in /charts directory!")
-print("="*80)
-
-# Save statistics to file
-with open('charts/statistics.txt', 'w', encoding='utf-8') as f:
-    f.write("KADR ENIC CANDIDATES - STATISTICAL SUMMARY\n")
-    f.write("="*80 + "\n\n")
-    f.write(f"Total Candidates: {len(df_clean)}\n")
-    f.write(f"Number of Countries: {df_clean['country'].nunique()}\n")
-    f.write(f"Number of Universities: {df_clean['university'].nunique()}\n")
-    f.write(f"Number of Specializations: {df_clean['specialization'].nunique()}\n")
-    f.write(f"\nMean Age: {age_data.mean():.1f} years\n")
-    f.write(f"Median Age: {age_data.median():.1f} years\n")
-    f.write(f"Age Range: {age_data.min():.0f} - {age_data.max():.0f} years\n")
-    f.write("\nTop 5 Countries:\n")
+def report_statistics(aggregates, charts_dir=CHARTS_DIR):
+    summary = aggregates['summary']
+    country_counts = aggregates['country_counts']
+    education_counts = aggregates['education_counts']
+    spec_counts = aggregates['spec_counts']
+    age = aggregates['age_histogram']
+    valid_records = aggregates['valid_records']
+
+    print("\n" + "="*80)
+    print("SUMMARY STATISTICS")
+    print("="*80)
+
+    print(f"\nTotal Candidates: {valid_records}")
+    print(f"Number of Countries: {summary['countries']}")
+    print(f"Number of Universities: {summary['universities']}")
+    print(f"Number of Specializations: {summary['specializations']}")
+
+    print("\n--- Age Statistics ---")
+    print(f"Mean Age: {age['mean']:.1f} years")
+    print(f"Median Age: {age['median']:.1f} years")
+    print(f"Age Range: {age['min']:.0f} - {age['max']:.0f} years")
+
+    print("\n--- Top 5 Countries ---")
     for i, (country, count) in enumerate(country_counts.head(5).items(), 1):
-        percentage = (count / len(df_clean)) * 100
-        f.write(f"{i}. {country}: {count} ({percentage:.1f}%)\n")
-
-print("\n✓ Statistics saved to: charts/statistics.txt")
+        percentage = (count / valid_records) * 100
+        print(f"{i}. {country}: {count} ({percentage:.1f}%)")
+
+    print("\n--- Education Level Distribution ---")
+    for level, count in education_counts.items():
+        percentage = (count / valid_records) * 100
+        print(f"  {level}: {count} ({percentage:.1f}%)")
+
+    print("\n--- Top 5 Specializations ---")
+    for i, (spec, count) in enumerate(spec_counts.head(5).items(), 1):
+        percentage = (count / valid_records) * 100
+        print(f"{i}. {spec}: {count} ({percentage:.1f}%)")
+
+    print("\n" + "="*80)
+
+    # Save statistics to file
+    stats_path = os.path.join(charts_dir, 'statistics.txt')
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        f.write("KADR ENIC CANDIDATES - STATISTICAL SUMMARY\n")
+        f.write("="*80 + "\n\n")
+        f.write(f"Total Candidates: {valid_records}\n")
+        f.write(f"Number of Countries: {summary['countries']}\n")
+        f.write(f"Number of Universities: {summary['universities']}\n")
+        f.write(f"Number of Specializations: {summary['specializations']}\n")
+        f.write(f"\nMean Age: {age['mean']:.1f} years\n")
+        f.write(f"Median Age: {age['median']:.1f} years\n")
+        f.write(f"Age Range: {age['min']:.0f} - {age['max']:.0f} years\n")
+        f.write("\nTop 5 Countries:\n")
+        for i, (country, count) in enumerate(country_counts.head(5).items(), 1):
+            percentage = (count / valid_records) * 100
+            f.write(f"{i}. {country}: {count} ({percentage:.1f}%)\n")
+
+    print(f"\n✓ Statistics saved to: {stats_path}")
+
+
+def generate(input_file=INPUT_FILE, charts_dir=CHARTS_DIR, charts=None, dpi=DEFAULT_DPI, stats_only=False,
+             jobs=1, categorizer=DEFAULT_CATEGORIZER, reference_year=DEFAULT_REFERENCE_YEAR, normalizer=None,
+             chunksize=None):
+    """Compute the aggregates for input_file, render charts and write statistics.txt into charts_dir.
+
+    `charts` limits rendering to the given CHARTS file names; with
+    stats_only nothing is rendered and matplotlib is never imported. A
+    normalize.NameNormalizer merges spelling variants of universities
+    and countries first. A chunksize streams the input with bounded
+    memory. Returns the aggregates.
+    """
+    os.makedirs(charts_dir, exist_ok=True)
+    cache = load_cache(charts_dir)
+    aggregates = load_aggregates(cache, input_file, categorizer, reference_year, normalizer, chunksize)
+
+    summary = aggregates['summary']
+    print(f"Total records: {summary['total_records']}")
+    print(f"Valid records: {aggregates['valid_records']}")
+    print(f"Records with missing data: {summary['total_records'] - aggregates['valid_records']}")
+
+    if not stats_only:
+        render_charts(aggregates, cache, charts_dir, jobs=jobs, charts=charts, dpi=dpi)
+        print(f"\n✓ Charts generated in {charts_dir}")
+    save_cache(cache, charts_dir)
+
+    report_statistics(aggregates, charts_dir)
+    return aggregates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate charts and statistics for KADR ENIC candidates')
+    parser.add_argument('--input', default=INPUT_FILE, help='scraper CSV to analyse')
+    parser.add_argument('--output-dir', default=CHARTS_DIR, help='directory for charts and statistics.txt')
+    parser.add_argument('--charts', type=lambda v: v.split(','), metavar='LIST',
+                        help='comma-separated chart numbers or file names to render (default: all)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='resolution of the PNG charts')
+    parser.add_argument('--stats-only', action='store_true',
+                        help='only compute and write statistics, without loading matplotlib')
+    parser.add_argument('--reference-year', type=int, default=DEFAULT_REFERENCE_YEAR,
+                        help='year ages are computed against')
+    parser.add_argument('--normalize-map', metavar='JSON',
+                        help='merge spelling variants of universities and countries using (and updating) this '
+                             'mapping file from normalize.py')
+    parser.add_argument('--chunksize', type=int, metavar='ROWS',
+                        help='stream the input in chunks of ROWS rows instead of loading it whole, for files '
+                             'larger than memory')
+    parser.add_argument('--jobs', type=int, default=1, help='render charts in N worker processes')
+    parser.add_argument('--categories', metavar='JSON',
+                        help='specialization keyword table: {"Category": ["keyword", ...], ...} in priority order')
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    try:
+        charts = select_charts(args.charts) if args.charts else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    categorizer = SpecializationCategorizer.from_file(args.categories) if args.categories else DEFAULT_CATEGORIZER
+    normalizer = None
+    if args.normalize_map:
+        from normalize import NameNormalizer
+        normalizer = NameNormalizer(args.normalize_map)
+    generate(args.input, args.output_dir, charts=charts, dpi=args.dpi, stats_only=args.stats_only,
+             jobs=args.jobs, categorizer=categorizer, reference_year=args.reference_year, normalizer=normalizer,
+             chunksize=args.chunksize)
+    print(f"\nTotal time: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Bulk downloader for candidate photos and certificates
+Streams files to a content-addressed store and records a per-candidate manifest
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+
+from scraper import KadrEnicScraper, candidate_key, encypt_id, keyed_candidates
+
+logger = logging.getLogger(__name__)
+
+# Media kinds and the candidate field that points at each
+MEDIA_FIELDS = {
+    'photo': 'photo_url',
+    'photo_detailed': 'photo_url_detailed',
+    'certificate': 'certificate_url',
+}
+# Downloads between manifest saves, so an interrupted run keeps most of its progress
+MANIFEST_SAVE_EVERY = 100
+
+
+class MediaDownloader:
+    """Downloads candidate media into media_dir/objects/<sha[:2]>/<sha256>.
+
+    URLs are deduplicated by their encyptId, so the usually identical
+    photo_url and photo_url_detailed cost one request, and a different
+    detailed photo is downloaded as well. Bodies are hashed while they
+    stream to a temporary file and then moved into place, so whole files
+    are never held in memory. The manifest maps every encyptId to its
+    object and every candidate to its files; ids already in the manifest
+    whose object is still on disk are skipped on re-runs. It is saved
+    every `save_every` downloads and when a run ends, even by an error.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, media_dir: str = 'media', concurrency: int = 8,
+                 chunk_size: int = 64 * 1024, save_every: int = MANIFEST_SAVE_EVERY):
+        self.session = session
+        self.media_dir = media_dir
+        self.objects_dir = os.path.join(media_dir, 'objects')
+        self.tmp_dir = os.path.join(media_dir, 'tmp')
+        self.manifest_path = os.path.join(media_dir, 'manifest.json')
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.chunk_size = chunk_size
+        self.save_every = save_every
+        self._unsaved = 0
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}, 'candidates': {}}
+
+    def save_manifest(self):
+        self._unsaved = 0
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def _is_present(self, media_id: str) -> bool:
+        entry = self.manifest['files'].get(media_id)
+        return bool(entry) and os.path.exists(self.object_path(entry['sha256']))
+
+    async def _download(self, media_id: str, url: str) -> bool:
+        """Stream one URL into the object store, returning whether it succeeded"""
+        tmp_path = os.path.join(self.tmp_dir, hashlib.sha1(media_id.encode('utf-8')).hexdigest())
+        async with self.semaphore:
+            try:
+                async with self.session.get(url) as response:
+                    if response.status != 200:
+                        logger.warning(f"HTTP {response.status} for {url}")
+                        return False
+                    digest = hashlib.sha256()
+                    size = 0
+                    with open(tmp_path, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(self.chunk_size):
+                            digest.update(chunk)
+                            f.write(chunk)
+                            size += len(chunk)
+                    content_type = response.headers.get('Content-Type', '')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error downloading {url}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False
+
+        sha256 = digest.hexdigest()
+        path = self.object_path(sha256)
+        if os.path.exists(path):
+            # Same content under another id, keep the stored copy
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        self.manifest['files'][media_id] = {'sha256': sha256, 'size': size, 'content_type': content_type}
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save_manifest()
+        return True
+
+    async def download_all(self, candidates: Iterable[Dict[str, str]]) -> Dict[str, int]:
+        """Download the media of all candidates and update the manifest"""
+        pending = {}
+        for key, candidate in keyed_candidates(candidates):
+            files = {}
+            for kind, field in MEDIA_FIELDS.items():
+                url = candidate.get(field, '')
+                if url:
+                    media_id = encypt_id(url) or url
+                    files[kind] = media_id
+                    if media_id not in pending and not self._is_present(media_id):
+                        pending[media_id] = url
+            if files:
+                self.manifest['candidates'][key] = files
+
+        logger.info(f"Downloading {len(pending)} media files "
+                    f"({len(self.manifest['files'])} already in the manifest)")
+        try:
+            results = await asyncio.gather(*(self._download(media_id, url) for media_id, url in pending.items()))
+        finally:
+            self.save_manifest()
+
+        stats = {'downloaded': sum(results), 'failed': len(results) - sum(results),
+                 'candidates': len(self.manifest['candidates'])}
+        logger.info(f"Media download finished: {stats['downloaded']} downloaded, {stats['failed']} failed")
+        return stats
+
+    def files_for(self, candidate: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Return the stored object path of each media kind for a candidate"""
+        paths = {}
+        for kind, media_id in self.manifest['candidates'].get(candidate_key(candidate), {}).items():
+            entry = self.manifest['files'].get(media_id)
+            paths[kind] = self.object_path(entry['sha256']) if entry else None
+        return paths
+
+
+def iter_csv_candidates(filename: str):
+    """Stream candidate rows from a scraper CSV"""
+    with open(filename, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+async def download_media(session: aiohttp.ClientSession, csv_filename: str, media_dir: str = 'media',
+                         concurrency: int = 8) -> Dict[str, int]:
+    """Download media for every candidate in a scraper CSV using an existing session"""
+    downloader = MediaDownloader(session, media_dir, concurrency=concurrency)
+    return await downloader.download_all(iter_csv_candidates(csv_filename))
+
+
+async def main(args: argparse.Namespace):
+    start_time = time.time()
+    async with KadrEnicScraper(cache_dir=None) as scraper:
+        await download_media(scraper.session, args.input, args.media_dir, args.concurrency)
+    logger.info(f"Total execution time: {time.time() - start_time:.2f} seconds")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Download candidate photos and certificates')
+    parser.add_argument('--input', default='kadr_enic_candidates.csv', help='scraper CSV to read URLs from')
+    parser.add_argument('--media-dir', default='media', help='directory for objects and manifest.json')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent downloads')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Fuzzy normalization of university and country names
+Clusters spelling variants with a character trigram blocking index and
+persists a name -> canonical name mapping that the scraper and the chart
+generator apply
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAPPING_FILE = 'name_mapping.json'
+MAPPING_VERSION = 1
+NORMALIZED_FIELDS = ('university', 'country')
+
+# Trigram Jaccard similarity at which two names are the same entity
+DEFAULT_THRESHOLD = 0.8
+# Trigrams shared by more names than this ("uni", "ver", ...) are too common to block on
+MAX_POSTINGS = 200
+# Most similar-looking names (by shared rare trigrams) that are scored per new name
+MAX_CANDIDATES = 50
+
+_PUNCTUATION_RE = re.compile(r"[\s.,;:'\"`«»“”()\-]+")
+
+
+def name_key(name: str) -> str:
+    """Comparison form of a name: case-folded, punctuation and spacing collapsed"""
+    return _PUNCTUATION_RE.sub(' ', name.casefold()).strip()
+
+
+def trigrams(key: str) -> frozenset:
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def same_entity(key_a: str, key_b: str) -> bool:
+    """Rule out names where one only adds whole words to the other.
+
+    "Dağıstan Dövlət Tibb Universiteti" is a different institution from
+    "Dağıstan Dövlət Universiteti" even though their trigrams overlap
+    heavily; spelling variants change letters within words instead.
+    """
+    words_a, words_b = set(key_a.split()), set(key_b.split())
+    return not (words_a < words_b or words_b < words_a)
+
+
+class NameClusterer:
+    """Incrementally clusters the names of one field.
+
+    Names with the same name_key() are merged outright. Every other new
+    name is only scored against names sharing one of its rarer trigrams,
+    through an inverted trigram index, so adding n names costs about
+    O(n) comparisons instead of O(n²). Matches above the threshold that
+    do not merely add words (see same_entity()) are joined with
+    union-find. Each cluster's canonical name is its most
+    frequent member at the time clusters merge, and stays put afterwards
+    so output does not flip between runs.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.parent = {}  # name -> parent name, roots are canonical names
+        self.counts = Counter()
+        self._by_key = {}  # name_key -> first name seen with it
+        self._grams = {}  # name -> trigrams of its key
+        self._postings = {}  # trigram -> names
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.parent
+
+    def find(self, name: str) -> str:
+        root = name
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[name] != root:
+            self.parent[name], name = root, self.parent[name]
+        return root
+
+    def _union(self, a: str, b: str):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        # Keep the better-attested canonical name, the older one on ties
+        if self.counts[root_b] > self.counts[root_a]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+
+    def _index(self, name: str):
+        grams = trigrams(name_key(name))
+        self._grams[name] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(name)
+
+    def _candidates(self, name: str) -> List[str]:
+        shared = Counter()
+        for gram in self._grams[name]:
+            postings = self._postings[gram]
+            if len(postings) <= MAX_POSTINGS:
+                shared.update(postings)
+        shared.pop(name, None)
+        return [other for other, _ in shared.most_common(MAX_CANDIDATES)]
+
+    def add(self, name: str, count: int = 1):
+        """Record occurrences of a name, clustering it if it is new"""
+        known = name in self.parent
+        self.counts[name] += count
+        if known:
+            return
+        self.parent[name] = name
+        if not name_key(name):
+            return  # empty and placeholder values are never merged
+        key = name_key(name)
+        if key in self._by_key:
+            self._union(self._by_key[key], name)
+            return
+        self._by_key[key] = name
+        self._index(name)
+        grams = self._grams[name]
+        for other in self._candidates(name):
+            if jaccard(grams, self._grams[other]) >= self.threshold and same_entity(key, name_key(other)):
+                self._union(other, name)
+
+    def canonical(self, name: str) -> str:
+        """Canonical name of a known name, unknown names are their own canonical name"""
+        return self.find(name) if name in self.parent else name
+
+    def mapping(self) -> Dict[str, str]:
+        """Every known name with its canonical name"""
+        return {name: self.find(name) for name in self.parent}
+
+    def to_dict(self) -> Dict:
+        return {'mapping': self.mapping(), 'counts': dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, state: Dict, threshold: float = DEFAULT_THRESHOLD) -> 'NameClusterer':
+        clusterer = cls(threshold)
+        clusterer.counts.update(state.get('counts', {}))
+        for name, canonical in state.get('mapping', {}).items():
+            clusterer.parent[name] = canonical
+            clusterer.parent.setdefault(canonical, canonical)
+            key = name_key(name)
+            if key:
+                clusterer._by_key.setdefault(key, name)
+                clusterer._index(name)
+        return clusterer
+
+
+class NameNormalizer:
+    """Canonical names for NORMALIZED_FIELDS, persisted as a JSON mapping file.
+
+    Loading rebuilds the trigram index from the stored names without
+    comparing them again, so later runs only score names they have not
+    seen before.
+    """
+
+    def __init__(self, path: Optional[str] = MAPPING_FILE, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        state = self._load() if path else None
+        if state and state.get('threshold') != threshold:
+            logger.warning(f"{path} was built with threshold {state.get('threshold')}, "
+                           f"keeping its clusters and using {threshold} for new names")
+        fields = (state or {}).get('fields', {})
+        self.fields = {field: NameClusterer.from_dict(fields.get(field, {}), threshold)
+                       for field in NORMALIZED_FIELDS}
+
+    def _load(self) -> Optional[Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get('version') == MAPPING_VERSION else None
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        state = {
+            'version': MAPPING_VERSION,
+            'threshold': self.threshold,
+            'fields': {field: clusterer.to_dict() for field, clusterer in self.fields.items()},
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def digest(self) -> str:
+        """Changes whenever any canonical name changes, for cache keys"""
+        mappings = {field: sorted(clusterer.mapping().items()) for field, clusterer in self.fields.items()}
+        return hashlib.sha256(repr(sorted(mappings.items())).encode('utf-8')).hexdigest()
+
+    def learn(self, candidates: Iterable[Dict[str, str]]):
+        """Count the names of many candidates and cluster the new ones"""
+        candidates = list(candidates)
+        for field in NORMALIZED_FIELDS:
+            self.learn_counts(field, Counter(resolved_field(candidate, field) for candidate in candidates))
+
+    def learn_counts(self, field: str, counts: Dict[str, int]):
+        """Add name occurrence counts for one field, most frequent first so common spellings become canonical"""
+        clusterer = self.fields[field]
+        for name, count in sorted(counts.items(), key=lambda item: -item[1]):
+            clusterer.add(name, count)
+
+    def canonical(self, field: str, name: str) -> str:
+        return self.fields[field].canonical(name)
+
+    def apply(self, candidate: Dict[str, str]):
+        """Rewrite a candidate's normalized fields to their canonical names in place.
+
+        Nothing is learned here: learn() every row of a run first, so the
+        most frequent spelling wins and no row keeps a name that a later
+        merge replaces.
+        """
+        for field, clusterer in self.fields.items():
+            candidate[field] = clusterer.canonical(resolved_field(candidate, field))
+
+    def changed(self) -> Dict[str, int]:
+        """Number of names mapped to a different canonical name, per field"""
+        return {field: sum(1 for name, canonical in clusterer.mapping().items() if name != canonical)
+                for field, clusterer in self.fields.items()}
+
+
+def resolved_field(candidate: Dict[str, str], field: str) -> str:
+    """A candidate's value for field, preferring country_detailed when the countries disagree.
+
+    country is split out of the listing text by COUNTRY_PATTERNS and can
+    be cut wrongly; country_detailed comes verbatim from the popup.
+    """
+    value = candidate.get(field, '')
+    if field == 'country':
+        detailed = candidate.get('country_detailed', '')
+        if detailed and detailed != value:
+            return detailed
+    return value
+
+
+def normalize_csv(path: str, normalizer: NameNormalizer, output: Optional[str] = None, learn: bool = True) -> int:
+    """Rewrite the normalized fields of a scraper CSV (in place by default), returning the rows changed.
+
+    With learn every row is learned in one pass before any is rewritten.
+    """
+    output = output or path
+    if learn:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            normalizer.learn(csv.DictReader(f))
+    changed = 0
+    tmp_path = f"{output}.tmp"
+    with open(path, 'r', newline='', encoding='utf-8') as src, \
+            open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        for row in reader:
+            before = [row[field] for field in NORMALIZED_FIELDS]
+            normalizer.apply(row)
+            changed += before != [row[field] for field in NORMALIZED_FIELDS]
+            writer.writerow(row)
+    os.replace(tmp_path, output)
+    return changed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Cluster spelling variants of university and country names')
+    parser.add_argument('--input', nargs='+', default=['kadr_enic_candidates.csv'], help='scraper CSVs to learn from')
+    parser.add_argument('--mapping', default=MAPPING_FILE, help='mapping file to update')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='trigram Jaccard similarity for two names to be merged')
+    parser.add_argument('--show', action='store_true', help='print every cluster with more than one name')
+    parser.add_argument('--apply', action='store_true', help='also rewrite the inputs with canonical names')
+    args = parser.parse_args(argv)
+
+    normalizer = NameNormalizer(args.mapping, args.threshold)
+    for path in args.input:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            normalizer.learn(csv.DictReader(f))
+    if args.apply:
+        for path in args.input:
+            print(f"{path}: {normalize_csv(path, normalizer, learn=False)} rows rewritten")
+    normalizer.save()
+    for field, changed in normalizer.changed().items():
+        print(f"{field}: {len(normalizer.fields[field].parent)} names, {changed} mapped to another spelling")
+
+    if args.show:
+        for field, clusterer in normalizer.fields.items():
+            clusters = {}
+            for name, canonical in clusterer.mapping().items():
+                clusters.setdefault(canonical, []).append(name)
+            for canonical, names in sorted(clusters.items()):
+                if len(names) > 1:
+                    print(f"\n[{field}] {canonical}")
+                    for name in sorted(names):
+                        if name != canonical:
+                            print(f"    {name} ({clusterer.counts[name]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
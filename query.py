@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Indexed in-memory queries over scraped KADR ENIC candidates
+Builds inverted indexes from the scraper CSV once, stores them in an index
+file and answers combined filters with bitmap intersections
+"""
+
+import argparse
+import bisect
+import csv
+import logging
+import os
+import pickle
+import sys
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from scraper import CSV_HEADERS
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'kadr_enic_candidates.idx'
+# Bump whenever the pickled layout of CandidateIndex changes
+INDEX_VERSION = 1
+
+# Fields with an inverted index: value -> bitmap of row ids
+INDEXED_FIELDS = ('country', 'university', 'education_level', 'specialization')
+
+# The greatest code point, so prefix + NAME_MAX sorts after every name starting with prefix
+NAME_MAX = '\U0010ffff'
+
+DateBound = Union[int, date, None]
+
+
+def parse_birth_date(value: str) -> Optional[Tuple[int, int, int]]:
+    """Turn 'DD.MM.YYYY' into a sortable (year, month, day), or None if malformed"""
+    try:
+        day, month, year = (int(part) for part in value.split('.'))
+    except ValueError:
+        return None
+    return year, month, day
+
+
+def _bitmap(row_ids: Iterable[int], size: int) -> int:
+    """Bitmap with the bits of the given row ids (all below size) set"""
+    buf = bytearray((size + 7) // 8)
+    for row_id in row_ids:
+        buf[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(buf, 'little')
+
+
+# Positions of the set bits of every byte value
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def _row_ids(bits: int, limit: Optional[int] = None) -> List[int]:
+    """Row ids set in a bitmap, ascending, stopping after limit of them.
+
+    Walks the bitmap's bytes once instead of clearing bits on the big
+    int, which would copy it for every match.
+    """
+    row_ids = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for byte_index, value in enumerate(data):
+        if value:
+            base = byte_index << 3
+            row_ids.extend(base + bit for bit in _BYTE_BITS[value])
+            if limit is not None and len(row_ids) >= limit:
+                return row_ids[:limit]
+    return row_ids
+
+
+class CandidateIndex:
+    """Candidates with inverted, birth-date and name-prefix indexes.
+
+    Rows are kept as tuples in CSV_HEADERS order and addressed by their
+    position. Each INDEXED_FIELDS value maps to an int used as a bitmap
+    of row ids, so combining filters is a handful of big-int ANDs. Birth
+    dates and lower-cased names are kept sorted next to their row ids and
+    searched with bisect for ranges and prefixes; every birth year also
+    has a bitmap, so only partial years at the ends of a date range are
+    assembled row by row.
+    """
+
+    def __init__(self, rows: List[Tuple[str, ...]], source_stamp: Optional[Tuple] = None):
+        self.rows = rows
+        self.source_stamp = source_stamp
+        self.all_rows = (1 << len(rows)) - 1
+        self.inverted = {field: {} for field in INDEXED_FIELDS}
+        births = []
+        names = []
+
+        positions = {field: CSV_HEADERS.index(field) for field in INDEXED_FIELDS}
+        name_pos = CSV_HEADERS.index('name')
+        birth_pos = CSV_HEADERS.index('birth_date')
+        postings = {field: {} for field in INDEXED_FIELDS}
+        for row_id, row in enumerate(rows):
+            for field, pos in positions.items():
+                postings[field].setdefault(row[pos], []).append(row_id)
+            birth = parse_birth_date(row[birth_pos])
+            if birth:
+                births.append((birth, row_id))
+            names.append((row[name_pos].lower(), row_id))
+        for field, values in postings.items():
+            self.inverted[field] = {value: _bitmap(row_ids, len(rows)) for value, row_ids in values.items()}
+
+        births.sort()
+        names.sort()
+        self.birth_keys = [birth for birth, _ in births]
+        self.birth_rows = [row_id for _, row_id in births]
+        self.name_keys = [name for name, _ in names]
+        self.name_rows = [row_id for _, row_id in names]
+
+        # Birth year -> (start, end) slice of birth_keys and the bitmap of those rows
+        self.year_spans = {}
+        self.year_bits = {}
+        start = 0
+        while start < len(self.birth_keys):
+            year = self.birth_keys[start][0]
+            end = bisect.bisect_left(self.birth_keys, (year + 1,), start)
+            self.year_spans[year] = (start, end)
+            self.year_bits[year] = _bitmap(self.birth_rows[start:end], len(rows))
+            start = end
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'CandidateIndex':
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header != CSV_HEADERS:
+                raise ValueError(f"{path} is not a scraper CSV")
+            rows = [tuple(row) for row in reader]
+        return cls(rows, source_stamp=file_stamp(path))
+
+    def save(self, path: str = INDEX_FILE):
+        # Plain attributes only, so the file loads whether this module ran as a script or was imported
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((INDEX_VERSION, self.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str = INDEX_FILE) -> Optional['CandidateIndex']:
+        """Load an index file, or None if it is missing or from another version"""
+        try:
+            with open(path, 'rb') as f:
+                version, state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+        if version != INDEX_VERSION:
+            return None
+        index = CandidateIndex.__new__(CandidateIndex)
+        index.__dict__.update(state)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _field_bits(self, field: str, values) -> int:
+        if isinstance(values, str):
+            values = [values]
+        bits = 0
+        for value in values:
+            bits |= self.inverted[field].get(value, 0)
+        return bits
+
+    def _birth_bits(self, born_after: DateBound, born_before: DateBound) -> int:
+        """Rows born strictly after born_after and strictly before born_before.
+
+        A bound is a year (born_after=1995 means born in 1996 or later) or
+        a date.
+        """
+        lo, hi = 0, len(self.birth_keys)
+        if born_after is not None:
+            key = (born_after, 12, 31) if isinstance(born_after, int) else \
+                (born_after.year, born_after.month, born_after.day)
+            lo = bisect.bisect_right(self.birth_keys, key)
+        if born_before is not None:
+            key = (born_before, 1, 1) if isinstance(born_before, int) else \
+                (born_before.year, born_before.month, born_before.day)
+            hi = bisect.bisect_left(self.birth_keys, key)
+
+        bits = 0
+        while lo < hi:
+            year = self.birth_keys[lo][0]
+            start, end = self.year_spans[year]
+            if lo == start and end <= hi:
+                bits |= self.year_bits[year]
+            else:
+                end = min(end, hi)
+                bits |= _bitmap(self.birth_rows[lo:end], len(self.rows))
+            lo = end
+        return bits
+
+    def _name_bits(self, prefix: str) -> int:
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(self.name_keys, prefix)
+        hi = bisect.bisect_right(self.name_keys, prefix + NAME_MAX, lo)
+        return _bitmap(self.name_rows[lo:hi], len(self.rows))
+
+    def match(self, country=None, university=None, education_level=None, specialization=None,
+              born_after: DateBound = None, born_before: DateBound = None, name_prefix: Optional[str] = None) -> int:
+        """Bitmap of the rows matching every given filter.
+
+        Field filters take one value or a list of alternatives.
+        """
+        bits = self.all_rows
+        for field, values in (('country', country), ('university', university),
+                              ('education_level', education_level), ('specialization', specialization)):
+            if values is not None:
+                bits &= self._field_bits(field, values)
+        if born_after is not None or born_before is not None:
+            bits &= self._birth_bits(born_after, born_before)
+        if name_prefix:
+            bits &= self._name_bits(name_prefix)
+        return bits
+
+    def count(self, **filters) -> int:
+        return self.match(**filters).bit_count()
+
+    def query(self, limit: Optional[int] = None, **filters) -> List[Dict[str, str]]:
+        """Rows matching every filter (see match()) as dicts, in CSV order"""
+        return self.rows_for(self.match(**filters), limit)
+
+    def rows_for(self, bits: int, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Rows of a bitmap from match() as dicts, in CSV order"""
+        row_ids = _row_ids(bits, limit)
+        return [dict(zip(CSV_HEADERS, self.rows[row_id])) for row_id in row_ids]
+
+    def values(self, field: str) -> Dict[str, int]:
+        """Distinct values of an indexed field with their row counts"""
+        return {value: bits.bit_count() for value, bits in self.inverted[field].items()}
+
+
+def file_stamp(path: str) -> Tuple[int, int]:
+    """Cheap change marker for a file: size and modification time"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_index(csv_path: str = 'kadr_enic_candidates.csv', index_path: str = INDEX_FILE) -> CandidateIndex:
+    """Load the index file, rebuilding and saving it when the CSV changed since it was built"""
+    index = CandidateIndex.load(index_path)
+    if index is not None and (not os.path.exists(csv_path) or index.source_stamp == file_stamp(csv_path)):
+        return index
+    logger.info(f"Building index of {csv_path}")
+    index = CandidateIndex.from_csv(csv_path)
+    index.save(index_path)
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Query scraped candidates through a prebuilt index')
+    parser.add_argument('--input', default='kadr_enic_candidates.csv', help='scraper CSV to index')
+    parser.add_argument('--index', default=INDEX_FILE, help='index file, rebuilt when --input changes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('build', help='(re)build the index file')
+
+    query_cmd = subparsers.add_parser('query', help='print matching candidates as CSV')
+    query_cmd.add_argument('--country', action='append', help='exact value, repeat for alternatives')
+    query_cmd.add_argument('--university', action='append', help='exact value, repeat for alternatives')
+    query_cmd.add_argument('--education-level', action='append', help='exact value, repeat for alternatives')
+    query_cmd.add_argument('--specialization', action='append', help='exact value, repeat for alternatives')
+    query_cmd.add_argument('--born-after', type=int, metavar='YYYY', help='born in a later year')
+    query_cmd.add_argument('--born-before', type=int, metavar='YYYY', help='born in an earlier year')
+    query_cmd.add_argument('--name', dest='name_prefix', metavar='PREFIX', help='case-insensitive name prefix')
+    query_cmd.add_argument('--limit', type=int, help='print at most this many rows')
+    query_cmd.add_argument('--count', action='store_true', help='print only the number of matches')
+
+    values_cmd = subparsers.add_parser('values', help='list the values of an indexed field with counts')
+    values_cmd.add_argument('field', choices=INDEXED_FIELDS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        index = CandidateIndex.from_csv(args.input)
+        index.save(args.index)
+        logger.info(f"Indexed {len(index)} candidates into {args.index}")
+        return 0
+
+    index = load_index(args.input, args.index)
+    if args.command == 'values':
+        for value, count in sorted(index.values(args.field).items(), key=lambda item: -item[1]):
+            print(f"{count}\t{value}")
+        return 0
+
+    filters = {key: getattr(args, key) for key in
+               ('country', 'university', 'education_level', 'specialization', 'born_after', 'born_before',
+                'name_prefix')}
+    start = time.perf_counter()
+    bits = index.match(**filters)
+    elapsed = time.perf_counter() - start
+    logger.info(f"{bits.bit_count()} of {len(index)} candidates match ({elapsed * 1e6:.0f} µs)")
+    if args.count:
+        print(bits.bit_count())
+        return 0
+    writer = csv.writer(sys.stdout)
+    writer.writerow(CSV_HEADERS)
+    for row in index.rows_for(bits, args.limit):
+        writer.writerow([row[header] for header in CSV_HEADERS])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,882 @@
 #!/usr/bin/env python3
 """
 Async web scraper for kadr.enic.edu.az
-Scrapes all candidate data from 150 pages and saves to CSV
+Discovers the listing page count, scrapes all candidate data and saves to CSV
 """
 
+import argparse
 import asyncio
 import aiohttp
+import bisect
 import csv
 import re
+import sys
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml is optional, the bs4 backend is always available
+    lxml = None
+from urllib.parse import urljoin, urlparse, parse_qs
 import logging
-from typing import List, Dict, Optional
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 import time
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class KadrEnicScraper:
+BASE_URL = "https://kadr.enic.edu.az/"
+
+# Common country endings that help identify separation, tried in order
+COUNTRY_PATTERNS = [re.compile(p) for p in (
+    r'(.*?Respublikası)(.*)',
+    r'(.*?Krallığı)(.*)',
+    r'(.*?Dövləti)(.*)',
+    r'(.*?Federasiyası)(.*)',
+    r'(.*?İttifaqı)(.*)',
+    r'(.*?Birliyi)(.*)',
+    r'(.*?Konfederasiyası)(.*)',
+    r'(.*?Sultanlığı)(.*)',
+    r'(.*?Knyazlığı)(.*)',
+    r'(.*?Xalq Respublikası)(.*)',
+    r'(.*?Ştatları)(.*)',
+)]
+
+OPENPOP_RE = re.compile(r"OpenPop\('([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)'\)")
+
+CSV_HEADERS = [
+    'page_number', 'name', 'surname', 'first_name',
+    'country', 'country_detailed', 'specialization', 'specialization_detailed',
+    'university', 'education_level', 'birth_date',
+    'photo_url', 'photo_url_detailed', 'certificate_url'
+]
+
+# Fields whose values repeat across thousands of candidates, stored interned
+INTERNED_FIELDS = frozenset({
+    'country', 'country_detailed', 'specialization', 'specialization_detailed',
+    'university', 'education_level',
+})
+
+PAGE_LINK_RE = re.compile(r'[?&]page=(\d+)')
+
+# Longest Retry-After we are willing to honour for a single retry
+MAX_RETRY_AFTER = 300
+
+# Used when page-count discovery fails, and as a safety cap while probing
+DEFAULT_MAX_PAGES = 150
+MAX_DISCOVERY_PAGES = 100000
+
+PARSE_BACKENDS = ('bs4', 'lxml')
+# Bump whenever a parser change alters the candidates it produces, so cached parses are redone
+PARSER_VERSION = 1
+DEFAULT_PARSE_BACKEND = 'lxml' if lxml is not None else 'bs4'
+
+# Where listing pages are parsed: on the event loop, or in a thread or process pool
+PARSE_MODES = ('inline', 'thread', 'process')
+
+
+class Candidate:
+    """Compact candidate record with the mapping interface of the dicts it replaces.
+
+    Fields are the CSV_HEADERS, kept in __slots__ instead of a per-record
+    dict. Like a dict a record only has the fields that were set: get()
+    falls back to the default and [] raises KeyError for the others.
+    High-repetition fields (INTERNED_FIELDS) are interned on assignment,
+    including when a pickled record is loaded in another process.
+    """
+
+    __slots__ = tuple(CSV_HEADERS)
+    _FIELDS = frozenset(CSV_HEADERS)
+
+    def __init__(self, fields: Optional[Dict[str, str]] = None, **kwargs):
+        for source in (fields or {}, kwargs):
+            for field, value in source.items():
+                self[field] = value
+
+    @classmethod
+    def from_dict(cls, fields: Dict[str, str]) -> 'Candidate':
+        return cls(fields)
+
+    def __getitem__(self, field: str):
+        try:
+            return getattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def __setitem__(self, field: str, value):
+        if field not in Candidate._FIELDS:
+            raise KeyError(field)
+        if field in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        setattr(self, field, value)
+
+    def __delitem__(self, field: str):
+        try:
+            delattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def __contains__(self, field) -> bool:
+        return field in Candidate._FIELDS and hasattr(self, field)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def get(self, field: str, default=None):
+        return getattr(self, field, default) if field in Candidate._FIELDS else default
+
+    def keys(self) -> List[str]:
+        return [field for field in CSV_HEADERS if hasattr(self, field)]
+
+    def values(self) -> List:
+        return [getattr(self, field) for field in self.keys()]
+
+    def items(self) -> List[Tuple[str, str]]:
+        return [(field, getattr(self, field)) for field in self.keys()]
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self.items())
+
+    def csv_values(self) -> List:
+        """Field values in CSV_HEADERS order, '' for unset fields"""
+        return [getattr(self, field, '') for field in CSV_HEADERS]
+
+    def __eq__(self, other):
+        if isinstance(other, Candidate):
+            return self.items() == other.items()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # mutable, like dict
+
+    def __repr__(self) -> str:
+        return f"Candidate({self.to_dict()!r})"
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, str]):
+        for field, value in state.items():
+            self[field] = value
+
+
+def _absolute_url(url: str, base_url: str) -> str:
+    # URLs already have the domain, don't add it again
+    return urljoin(base_url, url) if url and not url.startswith('http') else url
+
+
+def _apply_pos_lines(candidate: Dict[str, str], lines: List[str]):
+    """Fill country/specialization from the stripped text lines of div.pos"""
+    if len(lines) >= 2:
+        candidate['country'] = lines[0]
+        candidate['specialization'] = lines[1]
+    elif len(lines) == 1:
+        # Text might be concatenated, try to separate by known patterns
+        text = lines[0]
+        for pattern in COUNTRY_PATTERNS:
+            match = pattern.match(text)
+            if match:
+                candidate['country'] = match.group(1)
+                candidate['specialization'] = match.group(2)
+                break
+        else:
+            # Fallback: use the detailed data if available
+            candidate['country'] = text
+            candidate['specialization'] = ''
+    else:
+        candidate['country'] = ''
+        candidate['specialization'] = ''
+
+
+def _apply_onclick(candidate: Dict[str, str], onclick: str, base_url: str):
+    """Fill popup details from the OpenPop(...) call in an onclick attribute"""
+    match = OPENPOP_RE.search(onclick)
+    if match:
+        candidate['surname'] = match.group(1)
+        candidate['first_name'] = match.group(2)
+        candidate['specialization_detailed'] = match.group(3)
+        candidate['photo_url_detailed'] = _absolute_url(match.group(4), base_url)
+        candidate['certificate_url'] = _absolute_url(match.group(5), base_url)
+        candidate['birth_date'] = match.group(6)
+        candidate['country_detailed'] = match.group(7)
+        candidate['university'] = match.group(8)
+        candidate['education_level'] = match.group(9)
+
+
+def max_page_link(html: str) -> int:
+    """Return the highest ?page=N referenced by the page's links, or 0"""
+    return max((int(n) for n in PAGE_LINK_RE.findall(html)), default=0)
+
+
+def encypt_id(url: str) -> str:
+    """Return the encyptId query parameter of a getFile URL, or ''"""
+    values = parse_qs(urlparse(url).query).get('encyptId')
+    return values[0] if values else ''
+
+
+def candidate_key(candidate: Dict[str, str]) -> str:
+    """Stable identity of a candidate across runs.
+
+    The certificate's encyptId is unique per candidate; rows without a
+    certificate fall back to name and birth date. Placeholder rows ("--"
+    and nothing else) only differ by where they are listed, so they are
+    keyed on their page; keyed_candidates() numbers repeats within a page.
+    """
+    cert_id = encypt_id(candidate.get('certificate_url', ''))
+    if cert_id:
+        return cert_id
+    name, birth_date = candidate.get('name', ''), candidate.get('birth_date', '')
+    if name.strip('- ') or birth_date:
+        return f"{name}|{birth_date}"
+    return f"{name}|page {candidate.get('page_number', '')}"
+
+
+def keyed_candidates(candidates: Iterable[Dict[str, str]]) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """(candidate_key(), row) for rows in listing order, numbering repeated keys of rows without a certificate.
+
+    Two rows sharing a certificate are the same candidate, but rows
+    without one that share a key (placeholders on one page) are not.
+    """
+    repeats = Counter()
+    for candidate in candidates:
+        key = candidate_key(candidate)
+        if '|' in key:  # encyptIds are URL-encoded and never contain '|'
+            repeats[key] += 1
+            if repeats[key] > 1:
+                key = f"{key}|{repeats[key]}"
+        yield key, candidate
+
+
+def candidate_fingerprint(candidate: Dict[str, str]) -> str:
+    """Hash of a candidate's CSV fields, ignoring its listing position (page_number)"""
+    values = '\x1f'.join(str(candidate.get(header, '')) for header in CSV_HEADERS if header != 'page_number')
+    return hashlib.sha1(values.encode('utf-8')).hexdigest()
+
+
+def csv_row(candidate: Dict[str, str]) -> Dict[str, str]:
+    """Project a candidate onto CSV_HEADERS, filling missing fields with ''"""
+    return {header: candidate.get(header, '') for header in CSV_HEADERS}
+
+
+def csv_values(candidate: Dict[str, str]) -> List:
+    """Values of a candidate in CSV_HEADERS order, filling missing fields with ''"""
+    if isinstance(candidate, Candidate):
+        return candidate.csv_values()
+    return [candidate.get(header, '') for header in CSV_HEADERS]
+
+
+def parse_item_bs4(item, base_url: str = BASE_URL) -> Candidate:
+    """Parse candidate data from a BeautifulSoup list item"""
+    candidate = Candidate()
+
+    # Extract name
+    name_elem = item.find('span', class_='top')
+    candidate['name'] = name_elem.get_text(strip=True) if name_elem else ''
+
+    # Extract country and specialization
+    pos_elem = item.find('div', class_='pos')
+    if pos_elem:
+        # Get text content and split by <br> tags or newlines
+        pos_text = pos_elem.get_text(separator='\n', strip=True)
+        _apply_pos_lines(candidate, [line.strip() for line in pos_text.split('\n') if line.strip()])
+
+    # Extract photo URL
+    img_elem = item.find('img')
+    candidate['photo_url'] = urljoin(base_url, img_elem['src']) if img_elem else ''
+
+    # Extract popup details from onclick attribute
+    onclick_elem = item.find('a', {'onclick': True})
+    if onclick_elem:
+        _apply_onclick(candidate, onclick_elem.get('onclick', ''), base_url)
+
+    return candidate
+
+
+def _xpath_has_class(tag: str, css_class: str) -> str:
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+
+if lxml is not None:
+    _LIST_ITEMS_XPATH = etree.XPath(_xpath_has_class('div', 'list-item'))
+    _NAME_XPATH = etree.XPath(_xpath_has_class('span', 'top'))
+    _POS_XPATH = etree.XPath(_xpath_has_class('div', 'pos'))
+    _ONCLICK_XPATH = etree.XPath('.//a[@onclick]')
+
+
+def _lxml_strings(elem):
+    """Yield the text nodes under elem the way bs4's get_text() sees them.
+
+    Comments, processing instructions and script/style bodies are skipped,
+    but their tails belong to the parent and are kept.
+    """
+    if isinstance(elem.tag, str) and elem.tag not in ('script', 'style') and elem.text:
+        yield elem.text
+    for child in elem:
+        yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_text(elem, separator: str = '') -> str:
+    return separator.join(s for s in (t.strip() for t in _lxml_strings(elem)) if s)
+
+
+def parse_item_lxml(item, base_url: str = BASE_URL) -> Candidate:
+    """Parse candidate data from an lxml list item, mirroring parse_item_bs4"""
+    candidate = Candidate()
+
+    name_elems = _NAME_XPATH(item)
+    candidate['name'] = _lxml_text(name_elems[0]) if name_elems else ''
+
+    pos_elems = _POS_XPATH(item)
+    if pos_elems:
+        # _lxml_text already drops empty pieces, so every line is non-empty
+        pos_text = _lxml_text(pos_elems[0], separator='\n')
+        _apply_pos_lines(candidate, [line.strip() for line in pos_text.split('\n') if line.strip()])
+
+    img_elem = next(item.iter('img'), None)
+    candidate['photo_url'] = urljoin(base_url, img_elem.attrib['src']) if img_elem is not None else ''
+
+    onclick_elems = _ONCLICK_XPATH(item)
+    if onclick_elems:
+        _apply_onclick(candidate, onclick_elems[0].get('onclick', ''), base_url)
+
+    return candidate
+
+
+def _iter_list_items(html: str, backend: str):
+    """Yield (item, parse_function) pairs for every div.list-item on a page"""
+    if backend == 'lxml':
+        if lxml is None:
+            raise RuntimeError("The lxml parse backend requires the lxml package")
+        try:
+            root = lxml.html.fromstring(html)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration are rejected
+            root = lxml.html.fromstring(html.encode('utf-8'))
+        for item in _LIST_ITEMS_XPATH(root):
+            yield item, parse_item_lxml
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        for item in soup.find_all('div', class_='list-item'):
+            yield item, parse_item_bs4
+
+
+def parse_listing(html: str, page_num: int, backend: str = DEFAULT_PARSE_BACKEND,
+                  base_url: str = BASE_URL) -> List[Candidate]:
+    """Parse all candidates from a listing page's HTML with the given backend"""
+    candidates = []
+    if not html.strip():
+        return candidates
+
+    for item, parse_item in _iter_list_items(html, backend):
+        try:
+            candidate = parse_item(item, base_url)
+            if candidate.get('name'):  # Only add if we have a name
+                candidate['page_number'] = page_num
+                candidates.append(candidate)
+        except Exception as e:
+            logger.error(f"Error parsing candidate on page {page_num}: {e}")
+
+    return candidates
+
+
+def timed_parse_listing(html: str, page_num: int, backend: str = DEFAULT_PARSE_BACKEND,
+                        base_url: str = BASE_URL) -> Tuple[List[Candidate], float]:
+    """parse_listing() and the CPU seconds it took in the thread or process that ran it.
+
+    CPU time rather than wall time, so time spent waiting for the GIL in
+    a thread pool is not counted as parsing.
+    """
+    start = time.thread_time()
+    candidates = parse_listing(html, page_num, backend, base_url)
+    return candidates, time.thread_time() - start
+
+
+class ParsePipeline:
+    """Parse stage that keeps parse_listing() off the event loop.
+
+    Fetched pages go through a bounded asyncio.Queue to `workers`
+    consumer tasks, each handing one page at a time to a thread or
+    process pool of the same size. While the pools parse, the event loop
+    keeps reading responses. Every fetch attempt takes one of `capacity`
+    (fetch_slots + queue_size + workers) reservations and gives it back
+    if the attempt fails, or once its page is parsed if it succeeds, so
+    the requests in flight plus the pages fetched but not yet parsed
+    never exceed it: when parsing falls behind, fetching waits for it.
+    """
+
+    def __init__(self, mode: str = 'thread', workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 backend: str = DEFAULT_PARSE_BACKEND, base_url: str = BASE_URL, fetch_slots: int = 0):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown parse pipeline mode {mode!r}, expected 'thread' or 'process'")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.workers
+        self.fetch_slots = fetch_slots
+        self.backend = backend
+        self.base_url = base_url
+        self.queue = None
+        self.capacity = None
+        self.executor = None
+        self._tasks = []
+
+    def start(self):
+        """Create the queue, the pool and the consumer tasks (needs a running event loop)"""
+        self.queue = asyncio.Queue(self.queue_size)
+        self.capacity = asyncio.Semaphore(self.fetch_slots + self.queue_size + self.workers)
+        if self.mode == 'process':
+            # spawn: forking a process that runs an event loop and open sockets is unsafe
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='parse')
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            html, page_num, future = await self.queue.get()
+            try:
+                if not future.done():
+                    result = await loop.run_in_executor(self.executor, timed_parse_listing, html, page_num,
+                                                        self.backend, self.base_url)
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def parse(self, html: str, page_num: int) -> Tuple[List[Candidate], float]:
+        """timed_parse_listing() for one page in the pool, waiting for queue room first"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((html, page_num, future))
+        return await future
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+class FetchResult(NamedTuple):
+    """Outcome of a successful HTTP exchange for one page"""
+    status: int
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class PageCache:
+    """On-disk per-page cache of validators, content hash and parsed candidates.
+
+    Each page is stored as its own JSON file so concurrent pages never
+    contend for a single cache file. Entries record the parser that
+    produced their candidates; entries from any other parser are treated
+    as missing, so the page is fetched in full and parsed again.
+    """
+
+    def __init__(self, cache_dir: str = 'page_cache', parser: str = f"{DEFAULT_PARSE_BACKEND}/{PARSER_VERSION}"):
+        self.cache_dir = cache_dir
+        self.parser = parser
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, page_num: int) -> str:
+        return os.path.join(self.cache_dir, f"page_{page_num}.json")
+
+    def get(self, page_num: int) -> Optional[Dict]:
+        """Return the cached entry for a page, or None if missing, corrupt or from another parser"""
+        try:
+            with open(self._path(page_num), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('parser') != self.parser:
+            return None
+        entry['candidates'] = [Candidate.from_dict(c) for c in entry.get('candidates', [])]
+        return entry
+
+    def put(self, page_num: int, result: FetchResult, content_hash: str, candidates: List[Dict[str, str]],
+            max_page_link: int = 0):
+        """Atomically store the entry for a page"""
+        entry = {
+            'parser': self.parser,
+            'etag': result.etag,
+            'last_modified': result.last_modified,
+            'content_hash': content_hash,
+            'max_page_link': max_page_link,
+            'candidates': [dict(candidate) for candidate in candidates],
+        }
+        path = self._path(page_num)
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # shard processes may share the cache
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from a cache entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def content_hash(html: str) -> str:
+        return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with an optional requests-per-second cap.
+
+    The limit grows by roughly one slot per window of healthy responses
+    (success with latency within latency_tolerance of the best seen) and
+    is halved on timeouts, 429s and 5xx responses, at most once per
+    cooldown so a burst of failures from the same window counts once.
+    """
+
+    def __init__(self, initial: int = 10, min_limit: int = 1, max_limit: int = 100,
+                 rps: Optional[float] = None, latency_tolerance: float = 2.0, cooldown: float = 1.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+        self._best_latency = None
+        self._last_decrease = 0.0
+        self._logged_limit = int(self.limit)
+
+        # Token bucket, allowing bursts of up to one second's worth of requests
+        self.rps = rps
+        self._tokens = max(rps, 1.0) if rps else 0.0
+        self._last_refill = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.current_limit)
+            self.in_flight += 1
+        if self.rps:
+            await self._take_token()
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+    async def _take_token(self):
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(max(self.rps, 1.0), self._tokens + (now - self._last_refill) * self.rps)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rps)
+
+    def record_success(self, latency: float):
+        """Additively increase the limit if the response came back quickly"""
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        else:
+            # Let the baseline drift up slowly so one lucky response doesn't pin it
+            self._best_latency *= 1.01
+        if latency <= self._best_latency * self.latency_tolerance:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._log_change()
+
+    def record_failure(self):
+        """Multiplicatively decrease the limit on throttling or server errors"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        self._log_change()
+
+    def _log_change(self):
+        if self.current_limit != self._logged_limit:
+            logger.info(f"Concurrency limit {self._logged_limit} -> {self.current_limit}")
+            self._logged_limit = self.current_limit
+
+
+class CircuitBreaker:
+    """Pauses all requests when the recent error rate spikes.
+
+    Tracks the outcome of the last `window` throttling-relevant attempts
+    (successes, timeouts, connection errors, 429s and 5xx). Once at least
+    `min_samples` are recorded and the failure ratio reaches `threshold`,
+    the breaker opens for `pause` seconds and every attempt waits. It then
+    closes with an empty window, so a still-failing server trips it again.
+    """
+
+    def __init__(self, window: int = 20, min_samples: int = 10, threshold: float = 0.5, pause: float = 30.0):
+        self.outcomes = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.pause = pause
+        self.open_until = 0.0
+        self.trips = 0
+
+    def record(self, success: bool):
+        self.outcomes.append(success)
+        if len(self.outcomes) < self.min_samples or time.monotonic() < self.open_until:
+            return
+        failures = self.outcomes.count(False)
+        if failures / len(self.outcomes) >= self.threshold:
+            self.open_until = time.monotonic() + self.pause
+            self.outcomes.clear()
+            self.trips += 1
+            logger.warning(f"Circuit breaker open: {failures} recent failures, pausing requests for {self.pause:.0f}s")
+
+    async def wait(self):
+        while True:
+            remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class Histogram:
+    """Fixed-bucket histogram in the shape Prometheus expects"""
+
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': {str(b): c for b, c in zip(self.buckets + ['+Inf'], self.counts)},
+        }
+
+    def prometheus_lines(self, name: str) -> List[str]:
+        lines = [f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bucket, bucket_count in zip(self.buckets + ['+Inf'], self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{le="{bucket}"}} {cumulative}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+CANDIDATE_BUCKETS = (0, 1, 5, 10, 12, 15, 20, 50)
+
+
+class ScrapeMetrics:
+    """Per-phase timings and counters for one scraper run.
+
+    Fetch latency is per HTTP attempt; slot wait is the time spent
+    waiting for a concurrency slot; parse and write times are per page.
+    """
+
     def __init__(self):
-        self.base_url = "https://kadr.enic.edu.az/"
-        self.max_pages = 150
-        self.semaphore = asyncio.Semaphore(10)  # Limit concurrent requests
+        self.started_at = time.time()
+        self.finished_at = None
+        self.fetch_latency = Histogram(LATENCY_BUCKETS)
+        self.slot_wait = Histogram(LATENCY_BUCKETS)
+        self.parse_time = Histogram(DURATION_BUCKETS)  # CPU seconds, see timed_parse_listing()
+        self.write_time = Histogram(DURATION_BUCKETS)
+        self.candidates_per_page = Histogram(CANDIDATE_BUCKETS)
+        self.responses = Counter()  # HTTP status code, or 'timeout' / 'error'
+        self.pages = Counter()  # 'parsed', 'cached' or 'failed'
+        self.retries = 0
+        self.concurrency_limit = 0
+        self.failed_pages = []
+        self.circuit_breaker_trips = 0
+
+    def finish(self, concurrency_limit: int = 0, failed_pages=(), circuit_breaker_trips: int = 0):
+        self.finished_at = time.time()
+        self.concurrency_limit = concurrency_limit
+        self.failed_pages = sorted(failed_pages)
+        self.circuit_breaker_trips = circuit_breaker_trips
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': self.started_at,
+            'duration_seconds': self.duration,
+            'pages': dict(self.pages),
+            'responses': {str(k): v for k, v in self.responses.items()},
+            'retries': self.retries,
+            'failed_pages': self.failed_pages,
+            'circuit_breaker_trips': self.circuit_breaker_trips,
+            'concurrency_limit': self.concurrency_limit,
+            'fetch_latency_seconds': self.fetch_latency.to_dict(),
+            'slot_wait_seconds': self.slot_wait.to_dict(),
+            'parse_seconds': self.parse_time.to_dict(),
+            'write_seconds': self.write_time.to_dict(),
+            'candidates_per_page': self.candidates_per_page.to_dict(),
+        }
+
+    def to_prometheus(self, prefix: str = 'kadr_enic_scraper') -> str:
+        lines = []
+        for name, histogram in (('fetch_latency_seconds', self.fetch_latency),
+                                ('slot_wait_seconds', self.slot_wait),
+                                ('parse_seconds', self.parse_time),
+                                ('write_seconds', self.write_time),
+                                ('candidates_per_page', self.candidates_per_page)):
+            lines.extend(histogram.prometheus_lines(f"{prefix}_{name}"))
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for status, count in sorted(self.responses.items(), key=lambda item: str(item[0])):
+            lines.append(f'{prefix}_responses_total{{status="{status}"}} {count}')
+        lines.append(f"# TYPE {prefix}_pages_total counter")
+        for result, count in sorted(self.pages.items()):
+            lines.append(f'{prefix}_pages_total{{result="{result}"}} {count}')
+        lines.append(f"# TYPE {prefix}_retries_total counter")
+        lines.append(f"{prefix}_retries_total {self.retries}")
+        lines.append(f"# TYPE {prefix}_circuit_breaker_trips_total counter")
+        lines.append(f"{prefix}_circuit_breaker_trips_total {self.circuit_breaker_trips}")
+        lines.append(f"# TYPE {prefix}_failed_pages gauge")
+        lines.append(f"{prefix}_failed_pages {len(self.failed_pages)}")
+        lines.append(f"# TYPE {prefix}_concurrency_limit gauge")
+        lines.append(f"{prefix}_concurrency_limit {self.concurrency_limit}")
+        lines.append(f"# TYPE {prefix}_run_duration_seconds gauge")
+        lines.append(f"{prefix}_run_duration_seconds {self.duration}")
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {self.finished_at or time.time()}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        # node exporter's textfile collector must never see a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def write_json(self, path: str):
+        self._write_atomic(path, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus(self, path: str):
+        self._write_atomic(path, self.to_prometheus())
+
+
+class KadrEnicScraper:
+    def __init__(self, cache_dir: Optional[str] = 'page_cache', parse_backend: str = DEFAULT_PARSE_BACKEND,
+                 max_pages: Optional[int] = None, concurrency: int = 10, max_concurrency: int = 100,
+                 rps: Optional[float] = None, base_url: str = BASE_URL, request_timeout: float = 30,
+                 max_attempts: int = 3, retry_backoff_base: float = 1.0, retry_backoff_cap: float = 30.0,
+                 shard: Optional[Tuple[int, int]] = None, normalizer=None, parse_mode: str = 'inline',
+                 parse_workers: Optional[int] = None, archive=None, reorder_window: Optional[int] = None):
+        if parse_backend not in PARSE_BACKENDS:
+            raise ValueError(f"Unknown parse backend {parse_backend!r}, expected one of {PARSE_BACKENDS}")
+        if parse_mode not in PARSE_MODES:
+            raise ValueError(f"Unknown parse mode {parse_mode!r}, expected one of {PARSE_MODES}")
+        self.base_url = base_url
+        self.request_timeout = request_timeout
+        self.max_pages = max_pages  # None means discover the real page count before scraping
+        self.shard = shard  # (index, count): scrape only pages index+1, index+1+count, ...
+        self.normalizer = normalizer  # normalize.NameNormalizer learned from and applied to rows before output
+        self.archive = archive  # archive.PageArchive receiving every fetched page
+        self.limiter = AdaptiveLimiter(initial=concurrency, max_limit=max_concurrency, rps=rps)
+        # Pages started ahead of the next one to write, twice the concurrency cap by default
+        self.reorder_window = reorder_window or 2 * max_concurrency
+        self.circuit_breaker = CircuitBreaker()
+        self.max_attempts = max_attempts
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_cap = retry_backoff_cap
         self.session = None
+        self.page_cache = PageCache(cache_dir, f"{parse_backend}/{PARSER_VERSION}") if cache_dir else None
+        self.parse_backend = parse_backend
+        # None parses on the event loop (inline mode). A fetch slot per possible request in flight keeps
+        # the pipeline from capping concurrency, it only holds back fetching once parsing falls behind
+        self.parse_pipeline = None if parse_mode == 'inline' else \
+            ParsePipeline(parse_mode, parse_workers, backend=parse_backend, base_url=base_url,
+                          fetch_slots=max_concurrency)
+        self.failed_pages = set()
+        self.metrics = ScrapeMetrics()
+        self.pagination_hint = 0  # Highest ?page=N linked from any fetched page
+        self._probed_pages = {}  # Pages fetched during discovery, reused by scrape_all_pages
         
     async def __aenter__(self):
-        timeout = aiohttp.ClientTimeout(total=30)
-        connector = aiohttp.TCPConnector(limit=100)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        connector = aiohttp.TCPConnector(limit=self.limiter.max_limit)
         self.session = aiohttp.ClientSession(
             timeout=timeout,
             connector=connector,
@@ -35,205 +884,1056 @@ class KadrEnicScraper:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
         )
+        if self.parse_pipeline:
+            self.parse_pipeline.start()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.parse_pipeline:
+            await self.parse_pipeline.close()
         if self.session:
             await self.session.close()
 
-    async def fetch_page(self, url: str) -> Optional[str]:
-        """Fetch a single page with retry logic"""
-        async with self.semaphore:
-            for attempt in range(3):
-                try:
-                    async with self.session.get(url) as response:
-                        if response.status == 200:
-                            return await response.text()
-                        else:
-                            logger.warning(f"HTTP {response.status} for {url}")
-                            
-                except asyncio.TimeoutError:
-                    logger.warning(f"Timeout for {url} (attempt {attempt + 1})")
-                except Exception as e:
-                    logger.error(f"Error fetching {url}: {e}")
-                    
-                if attempt < 2:
-                    await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff
-                    
+    async def fetch_page(self, url: str, headers: Optional[Dict[str, str]] = None,
+                         reserve: bool = False) -> Optional[FetchResult]:
+        """Fetch a single page with retry logic.
+
+        Returns a FetchResult with status 200 and the body, or status 304
+        and an empty body when conditional headers were sent and the page
+        is unchanged. Returns None if every attempt failed.
+
+        Each attempt holds a concurrency slot only while its request is in
+        flight; the backoff between attempts (jittered exponential, or the
+        server's Retry-After if longer) is slept outside the limiter, so
+        failing pages wait in the event loop's timer queue instead of
+        blocking healthy ones. Every attempt first waits for the circuit
+        breaker to close.
+
+        With reserve and a parse pipeline, each attempt also holds a parse
+        reservation, given back before any backoff or breaker wait. A
+        returned result keeps it, and the caller releases it once the
+        page is handled.
+        """
+        for attempt in range(self.max_attempts):
+            await self.circuit_breaker.wait()
+            if attempt:
+                self.metrics.retries += 1
+            capacity = self.parse_pipeline.capacity if reserve and self.parse_pipeline else None
+            if capacity:
+                await capacity.acquire()
+            try:
+                result, retry_after = await self._fetch_once(url, headers, attempt)
+            except BaseException:
+                if capacity:
+                    capacity.release()
+                raise
+            if result:
+                return result
+            if capacity:
+                capacity.release()
+            if attempt < self.max_attempts - 1:
+                await asyncio.sleep(self._retry_delay(attempt, retry_after))
         return None
 
-    def parse_candidate_from_item(self, item) -> Dict[str, str]:
-        """Parse candidate data from a list item"""
-        candidate = {}
-        
-        # Extract name
-        name_elem = item.find('span', class_='top')
-        candidate['name'] = name_elem.get_text(strip=True) if name_elem else ''
-        
-        # Extract country and specialization
-        pos_elem = item.find('div', class_='pos')
-        if pos_elem:
-            # Get text content and split by <br> tags or newlines
-            pos_text = pos_elem.get_text(separator='\n', strip=True)
-            lines = [line.strip() for line in pos_text.split('\n') if line.strip()]
-            
-            if len(lines) >= 2:
-                candidate['country'] = lines[0]
-                candidate['specialization'] = lines[1]
-            elif len(lines) == 1:
-                # Text might be concatenated, try to separate by known patterns
-                text = lines[0]
-                # Common country endings that help identify separation
-                country_patterns = [
-                    r'(.*?Respublikası)(.*)',
-                    r'(.*?Krallığı)(.*)',
-                    r'(.*?Dövləti)(.*)', 
-                    r'(.*?Federasiyası)(.*)',
-                    r'(.*?İttifaqı)(.*)',
-                    r'(.*?Birliyi)(.*)',
-                    r'(.*?Konfederasiyası)(.*)',
-                    r'(.*?Sultanlığı)(.*)',
-                    r'(.*?Knyazlığı)(.*)',
-                    r'(.*?Xalq Respublikası)(.*)',
-                    r'(.*?Ştatları)(.*)'
-                ]
-                
-                found = False
-                for pattern in country_patterns:
-                    match = re.match(pattern, text)
-                    if match:
-                        candidate['country'] = match.group(1)
-                        candidate['specialization'] = match.group(2)
-                        found = True
-                        break
-                
-                if not found:
-                    # Fallback: use the detailed data if available
-                    candidate['country'] = text
-                    candidate['specialization'] = ''
-            else:
-                candidate['country'] = ''
-                candidate['specialization'] = ''
-        
-        # Extract photo URL
-        img_elem = item.find('img')
-        candidate['photo_url'] = urljoin(self.base_url, img_elem['src']) if img_elem else ''
-        
-        # Extract popup details from onclick attribute
-        onclick_elem = item.find('a', {'onclick': True})
-        if onclick_elem:
-            onclick = onclick_elem.get('onclick', '')
-            # Parse OpenPop function parameters - handle both single and double quotes
-            match = re.search(r"OpenPop\('([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)'\)", onclick)
-            if match:
-                candidate['surname'] = match.group(1)
-                candidate['first_name'] = match.group(2)
-                candidate['specialization_detailed'] = match.group(3)
-                # URLs already have the domain, don't add it again
-                photo_url = match.group(4)
-                candidate['photo_url_detailed'] = urljoin(self.base_url, photo_url) if photo_url and not photo_url.startswith('http') else photo_url
-                cert_url = match.group(5)
-                candidate['certificate_url'] = urljoin(self.base_url, cert_url) if cert_url and not cert_url.startswith('http') else cert_url
-                candidate['birth_date'] = match.group(6)
-                candidate['country_detailed'] = match.group(7)
-                candidate['university'] = match.group(8)
-                candidate['education_level'] = match.group(9)
-        
-        return candidate
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.retry_backoff_cap, self.retry_backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, MAX_RETRY_AFTER))
+        return delay
+
+    async def _fetch_once(self, url: str, headers: Optional[Dict[str, str]], attempt: int):
+        """Make one request inside a concurrency slot.
+
+        Returns (FetchResult, None) on success, or (None, retry_after) on
+        failure, where retry_after is the server's Retry-After in seconds
+        if it sent one.
+        """
+        wait_start = time.monotonic()
+        async with self.limiter:
+            self.metrics.slot_wait.observe(time.monotonic() - wait_start)
+            start = time.monotonic()
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    self.metrics.responses[response.status] += 1
+                    if response.status == 200:
+                        text = await response.text()
+                        latency = time.monotonic() - start
+                        self.metrics.fetch_latency.observe(latency)
+                        self.limiter.record_success(latency)
+                        self.circuit_breaker.record(True)
+                        return FetchResult(
+                            status=200,
+                            text=text,
+                            etag=response.headers.get('ETag'),
+                            last_modified=response.headers.get('Last-Modified'),
+                        ), None
+                    elif response.status == 304 and headers:
+                        latency = time.monotonic() - start
+                        self.metrics.fetch_latency.observe(latency)
+                        self.limiter.record_success(latency)
+                        self.circuit_breaker.record(True)
+                        return FetchResult(status=304, text=''), None
+                    else:
+                        self.metrics.fetch_latency.observe(time.monotonic() - start)
+                        if response.status == 429 or response.status >= 500:
+                            self.limiter.record_failure()
+                            self.circuit_breaker.record(False)
+                        logger.warning(f"HTTP {response.status} for {url} (attempt {attempt + 1})")
+                        return None, parse_retry_after(response.headers.get('Retry-After'))
+
+            except asyncio.TimeoutError:
+                self.metrics.responses['timeout'] += 1
+                self.limiter.record_failure()
+                self.circuit_breaker.record(False)
+                logger.warning(f"Timeout for {url} (attempt {attempt + 1})")
+            except Exception as e:
+                self.metrics.responses['error'] += 1
+                self.limiter.record_failure()
+                self.circuit_breaker.record(False)
+                logger.error(f"Error fetching {url}: {e}")
+        return None, None
+
+    def parse_candidate_from_item(self, item) -> Candidate:
+        """Parse candidate data from a BeautifulSoup list item (reference parser)"""
+        return parse_item_bs4(item, self.base_url)
 
     async def scrape_page(self, page_num: int) -> List[Dict[str, str]]:
         """Scrape candidates from a single page"""
         url = f"{self.base_url}?page={page_num}"
         logger.info(f"Scraping page {page_num}")
         
-        html = await self.fetch_page(url)
-        if not html:
+        cache_entry = self.page_cache.get(page_num) if self.page_cache else None
+        headers = PageCache.conditional_headers(cache_entry)
+        if self.archive is not None and page_num not in self.archive:
+            # A 304 would leave nothing to archive, so fetch the full body once
+            headers = {}
+        result = await self.fetch_page(url, headers=headers, reserve=True)
+        if not result:
             logger.error(f"Failed to fetch page {page_num}")
+            self.failed_pages.add(page_num)
+            self.metrics.pages['failed'] += 1
             return []
+        try:
+            return await self._handle_page(page_num, url, result, cache_entry)
+        finally:
+            if self.parse_pipeline:
+                self.parse_pipeline.capacity.release()
+
+    async def _handle_page(self, page_num: int, url: str, result: FetchResult,
+                           cache_entry: Optional[Dict]) -> List[Dict[str, str]]:
+        """Archive, cache and parse one fetched page"""
+        self.failed_pages.discard(page_num)
+        if self.archive:
+            self.archive.add(page_num, url, result)
         
-        soup = BeautifulSoup(html, 'html.parser')
-        candidates = []
+        if result.status == 304:
+            logger.info(f"Page {page_num} not modified, using {len(cache_entry['candidates'])} cached candidates")
+            self.pagination_hint = max(self.pagination_hint, cache_entry.get('max_page_link', 0))
+            self.metrics.pages['cached'] += 1
+            self.metrics.candidates_per_page.observe(len(cache_entry['candidates']))
+            return cache_entry['candidates']
         
-        # Find all candidate items
-        list_items = soup.find_all('div', class_='list-item')
+        html = result.text
+        page_link = max_page_link(html)
+        self.pagination_hint = max(self.pagination_hint, page_link)
+        content_hash = PageCache.content_hash(html)
+        if cache_entry and cache_entry.get('content_hash') == content_hash:
+            logger.info(f"Page {page_num} content unchanged, using {len(cache_entry['candidates'])} cached candidates")
+            candidates = cache_entry['candidates']
+            # Refresh validators so the next run can use a conditional request
+            self.page_cache.put(page_num, result, content_hash, candidates, page_link)
+            self.metrics.pages['cached'] += 1
+            self.metrics.candidates_per_page.observe(len(candidates))
+            return candidates
         
-        for item in list_items:
-            try:
-                candidate = self.parse_candidate_from_item(item)
-                if candidate.get('name'):  # Only add if we have a name
-                    candidate['page_number'] = page_num
-                    candidates.append(candidate)
-            except Exception as e:
-                logger.error(f"Error parsing candidate on page {page_num}: {e}")
+        if self.parse_pipeline:
+            candidates, parse_seconds = await self.parse_pipeline.parse(html, page_num)
+        else:
+            candidates, parse_seconds = timed_parse_listing(html, page_num, self.parse_backend, self.base_url)
+        self.metrics.parse_time.observe(parse_seconds)
+        self.metrics.pages['parsed'] += 1
+        self.metrics.candidates_per_page.observe(len(candidates))
         
         logger.info(f"Found {len(candidates)} candidates on page {page_num}")
+        if self.page_cache:
+            self.page_cache.put(page_num, result, content_hash, candidates, page_link)
         return candidates
 
-    async def scrape_all_pages(self) -> List[Dict[str, str]]:
-        """Scrape all pages concurrently"""
-        logger.info(f"Starting to scrape {self.max_pages} pages")
+    async def _probe_page(self, page_num: int) -> bool:
+        """Return whether a page has candidates, remembering its rows for the fan-out"""
+        if page_num not in self._probed_pages:
+            candidates = await self.scrape_page(page_num)
+            if page_num in self.failed_pages:
+                raise RuntimeError(f"Could not fetch page {page_num} during page-count discovery")
+            self._probed_pages[page_num] = candidates
+        return bool(self._probed_pages[page_num])
+
+    async def discover_page_count(self) -> int:
+        """Find the last listing page that still contains candidates.
+
+        The highest page linked from the pagination on page 1 is tried
+        first; if it is confirmed to be the last page that costs two extra
+        requests. Otherwise an exponential probe finds an empty page past
+        the last known non-empty one, and a binary search closes the gap.
+        """
+        if not await self._probe_page(1):
+            return 0
+        last_full, first_empty = 1, None
+
+        hint = self.pagination_hint
+        if hint > 1:
+            if await self._probe_page(hint):
+                last_full = hint
+            else:
+                first_empty = hint
+
+        step = 1
+        while first_empty is None:
+            probe = last_full + step
+            if probe > MAX_DISCOVERY_PAGES:
+                logger.warning(f"Page-count discovery stopped at {MAX_DISCOVERY_PAGES} pages")
+                return last_full
+            if await self._probe_page(probe):
+                last_full = probe
+                step *= 2
+            else:
+                first_empty = probe
+
+        while first_empty - last_full > 1:
+            mid = (last_full + first_empty) // 2
+            if await self._probe_page(mid):
+                last_full = mid
+            else:
+                first_empty = mid
+
+        logger.info(f"Discovered {last_full} pages (pagination hint {hint}, {len(self._probed_pages)} probes)")
+        return last_full
+
+    async def scrape_all_pages(self, sink=None) -> List[Dict[str, str]]:
+        """Scrape all pages concurrently.
+
+        Without a sink all candidates are collected and returned. With a
+        sink each page's rows are handed to it as soon as the page and
+        every page before it have completed, pages the sink has already
+        completed are skipped, and the returned list is empty. A sink is
+        a CsvSink, SqliteSink or MultiSink.
+
+        Either way rows come out in page order, so the output does not
+        depend on response timing. A page is only started once it is
+        within reorder_window pages of the next page to be written, so a
+        slow early page holds back at most that many finished pages. With a shard only that shard's pages
+        are scraped. A normalizer learns every returned row before any is
+        rewritten, but a sink's rows only page by page, which is why
+        main() normalizes the finished CSV instead.
+        """
+        if self.max_pages is None:
+            try:
+                self.max_pages = await self.discover_page_count()
+            except RuntimeError as e:
+                logger.error(f"{e}, falling back to {DEFAULT_MAX_PAGES} pages")
+                self.max_pages = DEFAULT_MAX_PAGES
+        page_nums = list(range(1, self.max_pages + 1))
+        if self.shard:
+            index, count = self.shard
+            page_nums = page_nums[index::count]
+        if sink and sink.completed_pages:
+            page_nums = [p for p in page_nums if p not in sink.completed_pages]
+        logger.info(f"Starting to scrape {len(page_nums)} pages")
         
-        # Create tasks for all pages
+        # Pages start in order, each once it is within reorder_window of
+        # the next page to write, and report to `finished` when done
+        window = asyncio.Semaphore(self.reorder_window)
+        finished = asyncio.Queue()
         tasks = []
-        for page_num in range(1, self.max_pages + 1):
-            task = asyncio.create_task(self.scrape_page(page_num))
-            tasks.append(task)
+
+        async def run_page(page_num):
+            finished.put_nowait(await self._scrape_page_numbered(page_num))
+
+        async def start_pages():
+            for page_num in page_nums:
+                await window.acquire()
+                tasks.append(asyncio.create_task(run_page(page_num)))
+
+        starter = asyncio.create_task(start_pages())
         
-        # Execute all tasks with progress tracking
+        # Finished pages wait in `ready` until every earlier page is done,
+        # then go out in order and free their place in the window
         all_candidates = []
-        completed = 0
+        ready = {}
+        next_index = 0
+        total = 0
         
-        for coro in asyncio.as_completed(tasks):
-            try:
-                candidates = await coro
-                all_candidates.extend(candidates)
-                completed += 1
-                logger.info(f"Progress: {completed}/{self.max_pages} pages completed")
-            except Exception as e:
-                logger.error(f"Task failed: {e}")
+        try:
+            for completed in range(1, len(page_nums) + 1):
+                page_num, candidates = await finished.get()
+                ready[page_num] = candidates
+                total += len(candidates)
+                logger.info(f"Progress: {completed}/{len(page_nums)} pages completed "
+                            f"(concurrency limit {self.limiter.current_limit}, {len(ready)} waiting to be written)")
+                while next_index < len(page_nums) and page_nums[next_index] in ready:
+                    page_num = page_nums[next_index]
+                    candidates = ready.pop(page_num)
+                    next_index += 1
+                    window.release()
+                    if not sink:
+                        all_candidates.extend(candidates)
+                    elif page_num not in self.failed_pages:
+                        self._normalize(candidates)
+                        write_start = time.perf_counter()
+                        sink.write_page(page_num, candidates)
+                        self.metrics.write_time.observe(time.perf_counter() - write_start)
+        finally:
+            starter.cancel()
+            for task in tasks:
+                task.cancel()
         
-        logger.info(f"Scraping completed. Total candidates: {len(all_candidates)}")
+        self._normalize(all_candidates)
+        self.metrics.finish(self.limiter.current_limit, self.failed_pages, self.circuit_breaker.trips)
+        logger.info(f"Scraping completed. Total candidates: {total}")
+        if self.failed_pages:
+            logger.error(f"{len(self.failed_pages)} pages failed after {self.max_attempts} attempts: "
+                         f"{sorted(self.failed_pages)}")
         return all_candidates
 
+    async def watch_cycle(self, seen: 'SeenSet', sink=None) -> int:
+        """Fetch pages in order until one holds only known candidates.
+
+        New registrations show up on the first pages, so a quiet poll
+        costs a single request (a 304 if the page cache has validators).
+        Unseen candidates are handed to the sink page by page and then
+        added to the seen-set. The cycle also ends at an empty page, at
+        max_pages, or when a page cannot be fetched. Returns the number of
+        new candidates.
+        """
+        last_page = self.max_pages or MAX_DISCOVERY_PAGES
+        new_total = 0
+        for page_num in range(1, last_page + 1):
+            candidates = await self.scrape_page(page_num)
+            if page_num in self.failed_pages:
+                logger.warning(f"Watch cycle stopped at page {page_num}, it could not be fetched")
+                break
+            keyed = [(key, c) for key, c in keyed_candidates(candidates) if key not in seen]
+            new = [c for _, c in keyed]
+            if new:
+                self._normalize(new)
+                if sink:
+                    write_start = time.perf_counter()
+                    sink.write_page(page_num, new)
+                    self.metrics.write_time.observe(time.perf_counter() - write_start)
+                seen.update(key for key, _ in keyed)
+                new_total += len(new)
+            if not new:
+                break
+        logger.info(f"Watch cycle checked {page_num} pages, {new_total} new candidates")
+        return new_total
+
+    async def watch(self, interval: float, seen: 'SeenSet', sink=None, on_cycle=None):
+        """Run watch cycles every `interval` seconds on this scraper's session until cancelled"""
+        while True:
+            await self.watch_cycle(seen, sink)
+            self.metrics.finish(self.limiter.current_limit, self.failed_pages, self.circuit_breaker.trips)
+            if on_cycle:
+                on_cycle()
+            self.failed_pages.clear()
+            await asyncio.sleep(interval)
+
+    def _normalize(self, candidates: List[Dict[str, str]]):
+        """Learn a batch of rows, then rewrite them with canonical names"""
+        if self.normalizer and candidates:
+            self.normalizer.learn(candidates)
+            for candidate in candidates:
+                self.normalizer.apply(candidate)
+
+    async def _scrape_page_numbered(self, page_num: int):
+        if page_num in self._probed_pages:
+            return page_num, self._probed_pages.pop(page_num)
+        try:
+            return page_num, await self.scrape_page(page_num)
+        except Exception as e:
+            logger.error(f"Page {page_num} failed: {e}")
+            self.failed_pages.add(page_num)
+            return page_num, []
+
     def save_to_csv(self, candidates: List[Dict[str, str]], filename: str = 'kadr_enic_candidates.csv'):
         """Save candidates data to CSV file"""
         if not candidates:
             logger.warning("No candidates to save")
             return
             
-        # Define CSV headers
-        headers = [
-            'page_number', 'name', 'surname', 'first_name', 
-            'country', 'country_detailed', 'specialization', 'specialization_detailed',
-            'university', 'education_level', 'birth_date',
-            'photo_url', 'photo_url_detailed', 'certificate_url'
-        ]
-        
+        write_start = time.perf_counter()
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=headers)
-                writer.writeheader()
+                writer = csv.writer(csvfile)
+                writer.writerow(CSV_HEADERS)
                 
                 for candidate in candidates:
-                    # Ensure all headers are present
-                    row = {header: candidate.get(header, '') for header in headers}
-                    writer.writerow(row)
+                    writer.writerow(csv_values(candidate))
                     
+            self.metrics.write_time.observe(time.perf_counter() - write_start)
             logger.info(f"Successfully saved {len(candidates)} candidates to {filename}")
             
         except Exception as e:
             logger.error(f"Error saving to CSV: {e}")
 
-async def main():
+
+class CsvSink:
+    """Streams candidate rows to a CSV file page by page.
+
+    After every page the rows are flushed and a checkpoint file next to
+    the CSV records the completed page numbers and the byte offset the
+    file had at that point. Resuming truncates the CSV back to that
+    offset, so rows from a page that was written but not checkpointed
+    are never duplicated.
+    """
+
+    def __init__(self, filename: str = 'kadr_enic_candidates.csv', resume: bool = False, append: bool = False):
+        self.filename = filename
+        self.checkpoint_path = f"{filename}.checkpoint.json"
+        self.completed_pages = set()
+        self.rows_written = 0
+        self.append = append
+
+        state = self._load_checkpoint() if resume else None
+        if append:
+            # Watch mode adds rows to an existing snapshot, pages mean nothing there
+            exists = os.path.exists(filename) and os.path.getsize(filename) > 0
+            self._file = open(filename, 'a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            if not exists:
+                self._writer.writerow(CSV_HEADERS)
+            self._commit()
+        elif state is not None and os.path.exists(filename):
+            self.completed_pages = set(state['pages'])
+            with open(filename, 'r+b') as f:
+                f.truncate(state['offset'])
+            self._file = open(filename, 'a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            logger.info(f"Resuming {filename}: {len(self.completed_pages)} pages already completed")
+        else:
+            if resume:
+                logger.warning(f"No usable checkpoint for {filename}, starting from scratch")
+            self._file = open(filename, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(CSV_HEADERS)
+            self._commit()
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _commit(self):
+        """Flush the CSV and atomically record the checkpoint"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self.append:
+            return
+        state = {'pages': sorted(self.completed_pages), 'offset': self._file.tell()}
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def write_page(self, page_num: int, candidates: List[Dict[str, str]]):
+        """Append one page's rows and mark the page as completed"""
+        for candidate in candidates:
+            self._writer.writerow(csv_values(candidate))
+        self.rows_written += len(candidates)
+        self.completed_pages.add(page_num)
+        self._commit()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Wrote {self.rows_written} candidates to {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SeenSet:
+    """Persistent set of candidate_key()s already written, for watch mode.
+
+    Keys live one per line in an append-only file. When the file does
+    not exist yet it is seeded from the keys in an existing snapshot CSV,
+    so watching can start right after a full scrape.
+    """
+
+    def __init__(self, filename: str, seed_csv: Optional[str] = None):
+        self.filename = filename
+        self.keys = set()
+        if os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                self.keys.update(line.rstrip('\n') for line in f if line.strip())
+        elif seed_csv and os.path.exists(seed_csv):
+            with open(seed_csv, 'r', newline='', encoding='utf-8') as f:
+                self.keys.update(key for key, _ in keyed_candidates(csv.DictReader(f)))
+            self._append(self.keys)
+        logger.info(f"Seen-set {filename} holds {len(self.keys)} candidates")
+
+    def _append(self, keys):
+        with open(self.filename, 'a', encoding='utf-8') as f:
+            f.writelines(f"{key}\n" for key in keys)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def update(self, keys):
+        new = [key for key in keys if key not in self.keys]
+        self.keys.update(new)
+        self._append(new)
+
+
+class SqliteSink:
+    """Upserts candidates into a SQLite database in batched transactions.
+
+    Rows are keyed on candidate_key() and carry a fingerprint of their
+    fields, so an unchanged candidate is not rewritten on later runs.
+    The fingerprint ignores page_number, which only reflects the listing
+    position; page_number keeps the value from the last actual change.
+    """
+
+    COLUMNS = ['candidate_id'] + CSV_HEADERS + ['row_hash', 'updated_at']
+    INDEXED_COLUMNS = ['country', 'university', 'education_level', 'birth_date']
+
+    # Does not checkpoint pages, upserts make re-running a page harmless
+    completed_pages = None
+
+    def __init__(self, filename: str = 'kadr_enic_candidates.db', batch_size: int = 500):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(filename, timeout=60)  # shard processes may share the database
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+        self._pending = []
+        self.rows_written = 0
+        self.rows_changed = 0
+
+        updates = ', '.join(f"{c} = excluded.{c}" for c in self.COLUMNS if c != 'candidate_id')
+        self._upsert_sql = (
+            f"INSERT INTO candidates ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self.COLUMNS)}) "
+            f"ON CONFLICT(candidate_id) DO UPDATE SET {updates} "
+            f"WHERE candidates.row_hash != excluded.row_hash"
+        )
+
+    def _create_schema(self):
+        columns = ', '.join(
+            'candidate_id TEXT PRIMARY KEY' if c == 'candidate_id'
+            else f"{c} INTEGER" if c == 'page_number'
+            else f"{c} TEXT"
+            for c in self.COLUMNS
+        )
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS candidates ({columns})")
+            for column in self.INDEXED_COLUMNS:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_candidates_{column} ON candidates ({column})")
+
+    def write_page(self, page_num: int, candidates: List[Dict[str, str]]):
+        """Queue one page's rows, committing once a full batch is pending"""
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        for key, candidate in keyed_candidates(candidates):
+            row = csv_row(candidate)
+            self._pending.append([key] + [row[h] for h in CSV_HEADERS] + [candidate_fingerprint(candidate), now])
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(self._upsert_sql, self._pending)
+        self.rows_changed += self.conn.total_changes - before
+        self.rows_written += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+            logger.info(f"Upserted {self.rows_written} candidates into {self.filename} "
+                        f"({self.rows_changed} new or changed)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class MultiSink:
+    """Fans pages out to several sinks.
+
+    A page counts as completed only if every sink that tracks pages has
+    completed it.
+    """
+
+    def __init__(self, sinks: List):
+        self.sinks = sinks
+
+    @property
+    def completed_pages(self):
+        tracked = [sink.completed_pages for sink in self.sinks if sink.completed_pages is not None]
+        return set.intersection(*tracked) if tracked else set()
+
+    def write_page(self, page_num: int, candidates: List[Dict[str, str]]):
+        for sink in self.sinks:
+            sink.write_page(page_num, candidates)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a shard spec like '0/4' into (index, count)"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, got {value!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}, got {index}")
+    return index, count
+
+
+def shard_filename(filename: str, shard: Tuple[int, int]) -> str:
+    """Per-shard variant of an output path, e.g. out.csv -> out.shard-0-of-4.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def merge_csv(inputs: List[str], output: str) -> int:
+    """Merge shard CSVs into one file ordered by page number.
+
+    Rows are copied verbatim and keep their order within a page. If a
+    page appears in more than one input (overlapping or repeated shard
+    runs) only the rows of the first input that has it are kept, so the
+    result matches a single-process run byte for byte. Returns the
+    number of rows written.
+    """
+    pages = {}
+    for filename in inputs:
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header != CSV_HEADERS:
+                raise ValueError(f"{filename} is not a scraper CSV")
+            file_pages = {}
+            for row in reader:
+                file_pages.setdefault(int(row[0]), []).append(row)
+        duplicates = sorted(page_num for page_num in file_pages if page_num in pages)
+        if duplicates:
+            logger.warning(f"Pages {duplicates} of {filename} are already merged, dropping their rows")
+        for page_num, rows in file_pages.items():
+            pages.setdefault(page_num, rows)
+
+    rows_written = 0
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS)
+        for page_num in sorted(pages):
+            writer.writerows(pages[page_num])
+            rows_written += len(pages[page_num])
+    os.replace(tmp_path, output)
+    logger.info(f"Merged {len(inputs)} files into {output}: {len(pages)} pages, {rows_written} candidates")
+    return rows_written
+
+
+def previous_snapshot_path(filename: str) -> str:
+    """Where the previous run's CSV is kept for delta output, e.g. out.csv -> out.prev.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.prev{ext}"
+
+
+def _snapshot_index(filename: str) -> Dict[str, str]:
+    """Map candidate_key to candidate_fingerprint for every row of a CSV, first occurrence wins"""
+    index = {}
+    if os.path.exists(filename):
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            for key, row in keyed_candidates(csv.DictReader(f)):
+                index.setdefault(key, candidate_fingerprint(row))
+    return index
+
+
+def write_delta(previous: str, current: str, delta_path: str) -> Counter:
+    """Write the rows that differ between two snapshot CSVs.
+
+    Candidates are matched on candidate_key() and compared by
+    candidate_fingerprint(), so moving to another page is not a change.
+    The delta is a CSV with a leading `change` column: 'added' and
+    'changed' rows carry the current values, 'removed' rows the previous
+    ones. Only the two key-to-hash indexes are held in memory, and each
+    file is read in a single streaming pass plus one more for removals.
+    A missing previous snapshot counts as empty. Returns the counts per
+    change type.
+    """
+    old_index = _snapshot_index(previous)
+    counts = Counter()
+    seen = set()
+    tmp_path = f"{delta_path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=['change'] + CSV_HEADERS)
+        writer.writeheader()
+        with open(current, 'r', newline='', encoding='utf-8') as f:
+            for key, row in keyed_candidates(csv.DictReader(f)):
+                if key in seen:
+                    continue
+                seen.add(key)
+                old_hash = old_index.get(key)
+                if old_hash is None:
+                    change = 'added'
+                elif old_hash != candidate_fingerprint(row):
+                    change = 'changed'
+                else:
+                    continue
+                writer.writerow({'change': change, **csv_row(row)})
+                counts[change] += 1
+        if any(key not in seen for key in old_index):
+            with open(previous, 'r', newline='', encoding='utf-8') as f:
+                for key, row in keyed_candidates(csv.DictReader(f)):
+                    if key not in seen:
+                        seen.add(key)
+                        writer.writerow({'change': 'removed', **csv_row(row)})
+                        counts['removed'] += 1
+    os.replace(tmp_path, delta_path)
+    logger.info(f"Wrote delta to {delta_path}: {counts['added']} added, {counts['changed']} changed, "
+                f"{counts['removed']} removed")
+    return counts
+
+
+def incomplete_marker_path(filename: str) -> str:
+    """Marker kept next to an output from before its run starts until its delta is written"""
+    return f"{filename}.incomplete"
+
+
+def _rotate_snapshot(args: argparse.Namespace):
+    """Keep the previous output for the delta, unless resuming the current snapshot.
+
+    The output is marked incomplete before anything is scraped, so a run
+    that fails, is interrupted or crashes never becomes a baseline: the
+    last complete snapshot stays in *.prev.csv and the partial output is
+    simply overwritten.
+    """
+    if not args.delta:
+        return
+    marker = incomplete_marker_path(args.output)
+    if os.path.exists(marker):
+        if not args.resume:
+            logger.warning(f"{args.output} is from an incomplete run, keeping "
+                           f"{previous_snapshot_path(args.output)} as the delta baseline")
+    elif not args.resume and os.path.exists(args.output):
+        os.replace(args.output, previous_snapshot_path(args.output))
+    with open(marker, 'w', encoding='utf-8'):
+        pass
+
+
+def _finish_delta(args: argparse.Namespace, complete: bool):
+    if not args.delta:
+        return
+    if not complete:
+        logger.warning("Snapshot is incomplete, skipping the delta until a --resume run finishes it")
+        return
+    write_delta(previous_snapshot_path(args.output), args.output, args.delta)
+    marker = incomplete_marker_path(args.output)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Scrape candidate data from kadr.enic.edu.az')
+    parser.add_argument('--output', default='kadr_enic_candidates.csv', help='CSV file to write')
+    parser.add_argument('--base-url', default=BASE_URL, help='site to scrape, e.g. a local mock server')
+    parser.add_argument('--resume', action='store_true',
+                        help='fetch only pages missing from the checkpoint and append to --output')
+    parser.add_argument('--max-pages', type=int, help='scrape exactly this many pages instead of discovering the count')
+    parser.add_argument('--concurrency', type=int, default=10, help='initial number of concurrent requests')
+    parser.add_argument('--max-concurrency', type=int, default=100, help='upper bound for the adaptive limit')
+    parser.add_argument('--reorder-window', type=int, metavar='PAGES',
+                        help='fetch at most this many pages ahead of the next page to write, bounding the rows '
+                             'held back by a slow page (default: twice --max-concurrency)')
+    parser.add_argument('--rps', type=float, help='cap on requests per second (default: uncapped)')
+    parser.add_argument('--parse-mode', choices=PARSE_MODES, default='inline',
+                        help='parse pages on the event loop, or in a thread or process pool that overlaps '
+                             'parsing with fetching')
+    parser.add_argument('--parse-workers', type=int, metavar='N',
+                        help='size of the --parse-mode thread or process pool (default: CPU count)')
+    parser.add_argument('--metrics-json', default='scrape_metrics.json', metavar='PATH',
+                        help='write a JSON summary of run metrics here')
+    parser.add_argument('--metrics-prom', default='scrape_metrics.prom', metavar='PATH',
+                        help='write Prometheus text-format metrics here (for the node exporter textfile collector)')
+    parser.add_argument('--sqlite', metavar='PATH', help='also upsert candidates into this SQLite database')
+    parser.add_argument('--download-media', metavar='DIR',
+                        help='after scraping, download photos and certificates into DIR')
+    parser.add_argument('--shard', type=parse_shard, metavar='INDEX/COUNT',
+                        help='scrape only every COUNT-th page starting at page INDEX+1 (0-based index) into '
+                             'a per-shard output such as kadr_enic_candidates.shard-0-of-4.csv')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='run this many shards in local worker processes and merge them into --output')
+    parser.add_argument('--merge', nargs='+', metavar='CSV',
+                        help='merge shard CSVs into --output in page order and exit without scraping')
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help='poll every SECONDS, fetching pages in order until one has only known candidates, '
+                             'and append new candidates to --output')
+    parser.add_argument('--seen', metavar='PATH',
+                        help='seen-set file for --watch (default: <output>.seen, seeded from --output)')
+    parser.add_argument('--normalize-map', metavar='JSON',
+                        help='rewrite university and country to canonical spellings using (and updating) this '
+                             'mapping file from normalize.py')
+    parser.add_argument('--archive', metavar='PATH',
+                        help='append the raw HTML of every fetched page to this compressed archive '
+                             '(index in PATH.idx.jsonl)')
+    parser.add_argument('--archive-codec', choices=('gzip', 'zstd'), default='gzip',
+                        help='compression for new --archive members (zstd needs the zstandard package)')
+    parser.add_argument('--replay', nargs='+', metavar='ARCHIVE',
+                        help='re-parse the latest archived HTML of every page into --output without '
+                             'fetching anything')
+    parser.add_argument('--delta', metavar='PATH',
+                        help='write candidates added, removed or changed since the previous run to PATH; '
+                             'the previous --output is kept next to it as *.prev.csv')
+    args = parser.parse_args(argv)
+    if args.shard and args.processes > 1:
+        parser.error('--shard and --processes are mutually exclusive')
+    if args.watch and (args.shard or args.processes > 1 or args.merge or args.delta or args.resume):
+        parser.error('--watch cannot be combined with --shard, --processes, --merge, --delta or --resume')
+    if args.replay and (args.watch or args.shard or args.processes > 1 or args.merge or args.resume or args.archive):
+        parser.error('--replay cannot be combined with --watch, --shard, --processes, --merge, --resume or --archive')
+    return args
+
+
+def _run_shard(args: argparse.Namespace):
+    asyncio.run(main(args))
+
+
+async def run_processes(args: argparse.Namespace):
+    """Scrape with one shard per worker process, then merge the shard CSVs into args.output.
+
+    Each worker has its own event loop, connection pool and concurrency
+    limit, so --concurrency and --rps apply per process.
+    """
+    count = args.processes
+    _rotate_snapshot(args)
+    context = multiprocessing.get_context('spawn')
+    workers = []
+    for index in range(count):
+        shard_args = argparse.Namespace(**vars(args))
+        shard_args.processes = 1
+        shard_args.shard = (index, count)
+        shard_args.download_media = None
+        shard_args.delta = None
+        shard_args.normalize_map = None  # normalized once after the merge, so workers share one mapping
+        if args.normalize_map:
+            shard_args.sqlite = None  # filled from the normalized CSV
+        worker = context.Process(target=_run_shard, args=(shard_args,), name=f"shard-{index}")
+        worker.start()
+        workers.append(worker)
+
+    loop = asyncio.get_running_loop()
+    for worker in workers:
+        await loop.run_in_executor(None, worker.join)
+    failed = [worker.name for worker in workers if worker.exitcode != 0]
+    if failed:
+        logger.error(f"Worker processes failed: {failed}, not merging. Re-run with --resume to finish them")
+        _finish_delta(args, complete=False)
+        return
+
+    merge_csv([shard_filename(args.output, (index, count)) for index in range(count)], args.output)
+    if args.normalize_map:
+        normalize_output(args)
+    _finish_delta(args, complete=True)
+    if args.download_media:
+        from media import download_media
+        async with KadrEnicScraper(cache_dir=None, base_url=args.base_url) as scraper:
+            await download_media(scraper.session, args.output, args.download_media)
+
+
+def upsert_csv(filename: str, db_path: str):
+    """Upsert every row of a scraper CSV into a SqliteSink database"""
+    with open(filename, 'r', newline='', encoding='utf-8') as f, SqliteSink(db_path) as db:
+        for page_num, rows in itertools.groupby(csv.DictReader(f), key=lambda row: row['page_number']):
+            db.write_page(int(page_num), list(rows))
+
+
+def _rebase_checkpoint(filename: str):
+    """Point a CSV's checkpoint at its current end after the file was rewritten in place"""
+    checkpoint_path = f"{filename}.checkpoint.json"
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return
+    state['offset'] = os.path.getsize(filename)
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def normalize_output(args: argparse.Namespace):
+    """Rewrite the finished --output with canonical names, then fill --sqlite from it.
+
+    Every name of the run is learned before any row is rewritten, so the
+    CSV always agrees with the saved mapping. The database is left out of
+    the scrape itself when normalizing and upserted from the CSV here.
+    """
+    from normalize import normalize_csv
+    normalizer = load_normalizer(args.normalize_map)
+    logger.info(f"Normalized names in {normalize_csv(args.output, normalizer)} rows of {args.output}")
+    normalizer.save()
+    _rebase_checkpoint(args.output)
+    if args.sqlite:
+        upsert_csv(args.output, args.sqlite)
+
+
+def open_archive(path: Optional[str], codec: str = 'gzip'):
+    """archive.PageArchive for a path, or None when archiving is off"""
+    if not path:
+        return None
+    from archive import PageArchive
+    return PageArchive(path, codec)
+
+
+def replay(args: argparse.Namespace):
+    """Rebuild --output (and --sqlite) from archived pages alone"""
+    from archive import latest_pages, missing_pages, replay_archive
+
+    pages = latest_pages(args.replay, args.max_pages)
+    if not pages:
+        logger.error(f"Not replaying: no archived pages in {', '.join(args.replay)}")
+        return
+    missing = missing_pages(pages)
+    if missing:
+        shown = ', '.join(map(str, missing[:20])) + (', ...' if len(missing) > 20 else '')
+        logger.error(f"Not replaying: {len(missing)} pages have no archived body ({shown}); "
+                     f"scrape again with --archive to fill them in")
+        return
+    _rotate_snapshot(args)
+    sinks = [CsvSink(args.output)]
+    if args.sqlite and not args.normalize_map:
+        sinks.append(SqliteSink(args.sqlite))
+    with MultiSink(sinks) as sink:
+        total = replay_archive(args.replay, sink, workers=args.parse_workers, max_pages=args.max_pages)
+    if args.normalize_map:
+        normalize_output(args)
+    logger.info(f"Replayed {total} candidates from {len(args.replay)} archive(s)")
+    _finish_delta(args, complete=True)
+
+
+def load_normalizer(path: Optional[str]):
+    """NameNormalizer for a mapping file, or None when normalization is off"""
+    if not path:
+        return None
+    from normalize import NameNormalizer
+    return NameNormalizer(path)
+
+
+async def watch(args: argparse.Namespace):
+    """Poll the listing with one long-lived session, appending new candidates"""
+    seen = SeenSet(args.seen or f"{args.output}.seen", seed_csv=args.output)
+    normalizer = load_normalizer(args.normalize_map)
+    archive = open_archive(args.archive, args.archive_codec)
+
+    try:
+        async with KadrEnicScraper(base_url=args.base_url, max_pages=args.max_pages, concurrency=args.concurrency,
+                                   max_concurrency=args.max_concurrency, rps=args.rps, normalizer=normalizer,
+                                   parse_mode=args.parse_mode, parse_workers=args.parse_workers,
+                                   archive=archive) as scraper:
+            def write_metrics():
+                if normalizer:
+                    normalizer.save()
+                if args.metrics_json:
+                    scraper.metrics.write_json(args.metrics_json)
+                if args.metrics_prom:
+                    scraper.metrics.write_prometheus(args.metrics_prom)
+
+            sinks = [CsvSink(args.output, append=True)]
+            if args.sqlite:
+                sinks.append(SqliteSink(args.sqlite, batch_size=1))
+            with MultiSink(sinks) as sink:
+                logger.info(f"Watching {args.base_url} every {args.watch:g}s")
+                await scraper.watch(args.watch, seen, sink, on_cycle=write_metrics)
+    finally:
+        if archive:
+            archive.close()
+
+
+async def main(args: argparse.Namespace):
     """Main function to run the scraper"""
     start_time = time.time()
-    
-    async with KadrEnicScraper() as scraper:
-        candidates = await scraper.scrape_all_pages()
-        scraper.save_to_csv(candidates)
+
+    if args.merge:
+        merge_csv(args.merge, args.output)
+        return
+    if args.replay:
+        replay(args)
+        logger.info(f"Total execution time: {time.time() - start_time:.2f} seconds")
+        return
+    if args.watch:
+        await watch(args)
+        return
+    if args.processes > 1:
+        await run_processes(args)
+        logger.info(f"Total execution time: {time.time() - start_time:.2f} seconds")
+        return
+    if args.shard:
+        args.output = shard_filename(args.output, args.shard)
+        if args.metrics_json:
+            args.metrics_json = shard_filename(args.metrics_json, args.shard)
+        if args.metrics_prom:
+            args.metrics_prom = shard_filename(args.metrics_prom, args.shard)
+        if args.archive:
+            args.archive = shard_filename(args.archive, args.shard)
+    _rotate_snapshot(args)
+
+    archive = open_archive(args.archive, args.archive_codec)
+    async with KadrEnicScraper(base_url=args.base_url, max_pages=args.max_pages, concurrency=args.concurrency,
+                               max_concurrency=args.max_concurrency, rps=args.rps, shard=args.shard,
+                               parse_mode=args.parse_mode, parse_workers=args.parse_workers,
+                               archive=archive, reorder_window=args.reorder_window) as scraper:
+        sinks = [CsvSink(args.output, resume=args.resume)]
+        if args.sqlite and not args.normalize_map:
+            sinks.append(SqliteSink(args.sqlite))
+        with MultiSink(sinks) as sink:
+            await scraper.scrape_all_pages(sink=sink)
+        if archive:
+            archive.close()
+        if scraper.failed_pages:
+            logger.warning("Failed pages are not checkpointed, re-run with --resume to fetch only those")
+            if args.normalize_map:
+                logger.warning(f"Names in {args.output} are normalized once a run completes every page")
+        elif args.normalize_map:
+            normalize_output(args)
+        _finish_delta(args, complete=not scraper.failed_pages)
+        if args.metrics_json:
+            scraper.metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            scraper.metrics.write_prometheus(args.metrics_prom)
+        if args.download_media:
+            from media import download_media
+            await download_media(scraper.session, args.output, args.download_media)
     
     end_time = time.time()
     logger.info(f"Total execution time: {end_time - start_time:.2f} seconds")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,130 @@
+"""PageArchive members and index records, and replaying archives with gap detection"""
+
+import argparse
+import csv
+import glob
+import os
+
+import pytest
+
+from archive import ArchiveReader, PageArchive, latest_pages, missing_pages, read_index, replay_archive
+from scraper import CSV_HEADERS, FetchResult, parse_listing, replay
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'listing_pages')
+BASE_URL = 'https://kadr.enic.edu.az/'
+
+
+def fixture_page(page_num):
+    with open(os.path.join(PAGES_DIR, f"page_{page_num}.html"), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def ok(html, etag='"v1"'):
+    return FetchResult(status=200, text=html, etag=etag, last_modified=None)
+
+
+NOT_MODIFIED = FetchResult(status=304, text='')
+
+
+def archive_pages(path, page_nums, codec='gzip'):
+    with PageArchive(path, codec) as archive:
+        for page_num in page_nums:
+            archive.add(page_num, f"{BASE_URL}?page={page_num}", ok(fixture_page(page_num)))
+
+
+class ListSink:
+    def __init__(self):
+        self.pages = []
+
+    def write_page(self, page_num, candidates):
+        self.pages.append((page_num, candidates))
+
+
+def test_members_are_reused(tmp_path):
+    path = str(tmp_path / 'pages.gz')
+    html = fixture_page(1)
+    with PageArchive(path) as archive:
+        archive.add(1, f"{BASE_URL}?page=1", ok(html))
+        archive.add(1, f"{BASE_URL}?page=1", ok(html, etag='"v2"'))  # same body refetched
+        archive.add(1, f"{BASE_URL}?page=1", NOT_MODIFIED)
+        archive.add(2, f"{BASE_URL}?page=2", NOT_MODIFIED)  # nothing archived to point at
+        assert archive.members_written == 1
+        assert 1 in archive and 2 not in archive
+
+    records = read_index(path)
+    assert [(record['page'], record['status']) for record in records] == [(1, 200), (1, 200), (1, 304)]
+    assert len({record['offset'] for record in records}) == 1
+    reader = ArchiveReader(path)
+    try:
+        assert reader.read(records[-1]) == html
+    finally:
+        reader.close()
+
+
+def test_reopened_archive_continues(tmp_path):
+    path = str(tmp_path / 'pages.gz')
+    archive_pages(path, [1])
+    with PageArchive(path) as archive:
+        assert 1 in archive
+        archive.add(1, f"{BASE_URL}?page=1", NOT_MODIFIED)
+        archive.add(2, f"{BASE_URL}?page=2", ok(fixture_page(2)))
+    assert [record['page'] for _, record in latest_pages([path])] == [1, 2]
+
+
+def test_torn_index_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'pages.gz')
+    archive_pages(path, [1, 2])
+    with open(f"{path}.idx.jsonl", 'a', encoding='utf-8') as f:
+        f.write('{"page": 3, "offs')
+    assert [record['page'] for record in read_index(path)] == [1, 2]
+
+
+def test_missing_pages(tmp_path):
+    path = str(tmp_path / 'pages.gz')
+    archive_pages(path, [1, 2, 4])
+    assert missing_pages(latest_pages([path])) == [3]
+    assert missing_pages(latest_pages([path], max_pages=2)) == []
+    assert missing_pages([]) == []
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_replay_matches_parsing(tmp_path, workers):
+    first, second = str(tmp_path / 'a.gz'), str(tmp_path / 'b.gz')
+    archive_pages(first, [1, 3])
+    archive_pages(second, [2, 4])
+
+    sink = ListSink()
+    total = replay_archive([first, second], sink, workers=workers)
+    expected = [(page_num, parse_listing(fixture_page(page_num), page_num, base_url=BASE_URL))
+                for page_num in (1, 2, 3, 4)]
+    assert sink.pages == expected
+    assert total == sum(len(candidates) for _, candidates in expected)
+
+
+def replay_args(tmp_path, archives):
+    return argparse.Namespace(replay=archives, output=str(tmp_path / 'out.csv'), sqlite=None, normalize_map=None,
+                              delta=None, resume=False, parse_workers=1, max_pages=None)
+
+
+def test_replay_writes_every_page(tmp_path):
+    path = str(tmp_path / 'pages.gz')
+    archive_pages(path, [1, 2, 3, 4])
+    args = replay_args(tmp_path, [path])
+    replay(args)
+    with open(args.output, 'r', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == sum(len(parse_listing(fixture_page(page_num), page_num)) for page_num in (1, 2, 3, 4))
+
+
+@pytest.mark.parametrize('page_nums', [[], [1, 2, 4], [2, 3]])
+def test_replay_refuses_gaps(tmp_path, page_nums):
+    path = str(tmp_path / 'pages.gz')
+    archive_pages(path, page_nums)
+    args = replay_args(tmp_path, [path])
+    previous = ','.join(CSV_HEADERS) + '\nfrom the last run\n'
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(previous)
+    replay(args)
+    with open(args.output, 'r', encoding='utf-8') as f:
+        assert f.read() == previous
+    assert glob.glob(str(tmp_path / 'out*')) == [args.output]
@@ -0,0 +1,66 @@
+"""CsvSink checkpoints and --resume"""
+
+import argparse
+import csv
+
+from scraper import CSV_HEADERS, CsvSink, normalize_output
+
+
+def page_rows(page_num, count=3):
+    rows = []
+    for index in range(count):
+        row = dict.fromkeys(CSV_HEADERS, '')
+        row.update(page_number=page_num, name=f"Ad{page_num}-{index}", university='Bakı Dövlət Universiteti',
+                   certificate_url=f"https://example.org/getFile/?encyptId=p{page_num}r{index}")
+        rows.append(row)
+    return rows
+
+
+def read_names(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return [row['name'] for row in csv.DictReader(f)]
+
+
+def test_resume_drops_rows_written_after_the_checkpoint(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    with CsvSink(path) as sink:
+        sink.write_page(1, page_rows(1))
+        sink.write_page(2, page_rows(2))
+    # A crash between writing page 3's rows and checkpointing them
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow([row[h] for row in page_rows(3)[:1] for h in CSV_HEADERS])
+
+    with CsvSink(path, resume=True) as sink:
+        assert sink.completed_pages == {1, 2}
+        sink.write_page(3, page_rows(3))
+    assert read_names(path) == [row['name'] for page in (1, 2, 3) for row in page_rows(page)]
+
+
+def test_resume_without_checkpoint_starts_over(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('garbage\n')
+    with CsvSink(path, resume=True) as sink:
+        assert sink.completed_pages == set()
+        sink.write_page(1, page_rows(1))
+    assert read_names(path) == [row['name'] for row in page_rows(1)]
+
+
+def test_resume_after_normalizing_in_place(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    rows = page_rows(1) + page_rows(2)
+    rows[0]['university'] = 'Bakı Dövlət Universiteti.'  # rewritten to the shorter, more frequent spelling
+    with CsvSink(path) as sink:
+        sink.write_page(1, rows[:3])
+        sink.write_page(2, rows[3:])
+    with open(path, 'r', encoding='utf-8') as f:
+        scraped = f.read()
+    normalize_output(argparse.Namespace(output=path, normalize_map=str(tmp_path / 'map.json'), sqlite=None))
+    with open(path, 'r', encoding='utf-8') as f:
+        normalized = f.read()
+    assert len(normalized) < len(scraped)
+
+    with CsvSink(path, resume=True) as sink:
+        assert sink.completed_pages == {1, 2}
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read() == normalized
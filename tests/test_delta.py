@@ -0,0 +1,104 @@
+"""--delta snapshots: write_delta() and the rotation of *.prev.csv across complete and interrupted runs"""
+
+import argparse
+import csv
+import os
+
+from scraper import (CSV_HEADERS, _finish_delta, _rotate_snapshot, incomplete_marker_path, previous_snapshot_path,
+                     write_delta)
+
+
+def candidate(index, page_num=1, **fields):
+    row = dict.fromkeys(CSV_HEADERS, '')
+    row.update(page_number=page_num, name=f"Ad{index} Soyad{index}", birth_date='01.02.1990',
+               certificate_url=f"https://example.org/getFile/?encyptId=c{index}")
+    row.update(fields)
+    return row
+
+
+def placeholder(page_num):
+    row = dict.fromkeys(CSV_HEADERS, '')
+    row.update(page_number=page_num, name='--', country='--', photo_url='https://example.org/img/default.png')
+    return row
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_delta(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return sorted((row['change'], row['name']) for row in csv.DictReader(f))
+
+
+def test_write_delta(tmp_path):
+    previous, current, delta = (str(tmp_path / name) for name in ('prev.csv', 'out.csv', 'delta.csv'))
+    write_csv(previous, [candidate(1), candidate(2), candidate(3)])
+    # 1 moved to another page (not a change), 2 changed, 3 removed, 4 added
+    write_csv(current, [candidate(1, page_num=2), candidate(2, university='Yeni Universitet'), candidate(4)])
+
+    counts = write_delta(previous, current, delta)
+    assert counts == {'added': 1, 'changed': 1, 'removed': 1}
+    assert read_delta(delta) == [('added', 'Ad4 Soyad4'), ('changed', 'Ad2 Soyad2'), ('removed', 'Ad3 Soyad3')]
+
+
+def test_placeholders_are_separate_candidates(tmp_path):
+    previous, current, delta = (str(tmp_path / name) for name in ('prev.csv', 'out.csv', 'delta.csv'))
+    write_csv(previous, [placeholder(1), placeholder(2), placeholder(2)])
+    write_csv(current, [placeholder(1), placeholder(2), placeholder(2), placeholder(3)])
+
+    assert write_delta(previous, current, delta) == {'added': 1}
+
+
+def test_missing_previous_snapshot_is_empty(tmp_path):
+    current, delta = str(tmp_path / 'out.csv'), str(tmp_path / 'delta.csv')
+    write_csv(current, [candidate(1), candidate(2)])
+    assert write_delta(str(tmp_path / 'missing.csv'), current, delta) == {'added': 2}
+
+
+def run(args, rows, complete=True):
+    """One scrape of rows into args.output as main() does it, or one cut off before it could finish"""
+    _rotate_snapshot(args)
+    write_csv(args.output, rows if complete else rows[:1])
+    if complete:
+        _finish_delta(args, complete=True)
+
+
+def test_interrupted_run_keeps_the_baseline(tmp_path):
+    args = argparse.Namespace(output=str(tmp_path / 'out.csv'), delta=str(tmp_path / 'delta.csv'), resume=False)
+    rows = [candidate(index) for index in range(5)]
+    run(args, rows)
+    run(args, rows)
+    assert read_delta(args.delta) == []
+    assert not os.path.exists(incomplete_marker_path(args.output))
+
+    # Killed mid-scrape: no delta, and the marker stays behind
+    run(args, rows, complete=False)
+    assert os.path.exists(incomplete_marker_path(args.output))
+
+    # The partial output must not become the baseline of the next run
+    run(args, rows)
+    assert read_delta(args.delta) == []
+    with open(previous_snapshot_path(args.output), 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == len(rows) + 1
+
+
+def test_failed_run_resumed(tmp_path):
+    args = argparse.Namespace(output=str(tmp_path / 'out.csv'), delta=str(tmp_path / 'delta.csv'), resume=False)
+    rows = [candidate(index) for index in range(5)]
+    run(args, rows)
+
+    _rotate_snapshot(args)
+    write_csv(args.output, rows[:2] + [candidate(9)])
+    _finish_delta(args, complete=False)
+    assert os.path.exists(incomplete_marker_path(args.output))
+
+    args.resume = True
+    _rotate_snapshot(args)
+    write_csv(args.output, rows[:2] + [candidate(9)] + rows[2:])
+    _finish_delta(args, complete=True)
+    assert read_delta(args.delta) == [('added', 'Ad9 Soyad9')]
+    assert not os.path.exists(incomplete_marker_path(args.output))
@@ -0,0 +1,172 @@
+"""AdaptiveLimiter, CircuitBreaker, Retry-After handling and fetch_page() retries"""
+
+import asyncio
+import time
+from email.utils import formatdate
+
+from scraper import AdaptiveLimiter, CircuitBreaker, KadrEnicScraper, parse_retry_after
+
+
+def test_limit_grows_on_fast_responses():
+    limiter = AdaptiveLimiter(initial=2, max_limit=4)
+    for _ in range(50):
+        limiter.record_success(0.1)
+    assert limiter.current_limit == 4
+
+
+def test_slow_responses_do_not_grow_the_limit():
+    limiter = AdaptiveLimiter(initial=2, latency_tolerance=2.0)
+    limiter.record_success(0.1)
+    before = limiter.limit
+    limiter.record_success(1.0)
+    assert limiter.limit == before
+
+
+def test_failures_halve_the_limit_once_per_cooldown():
+    limiter = AdaptiveLimiter(initial=16, cooldown=60)
+    limiter.record_failure()
+    limiter.record_failure()
+    assert limiter.current_limit == 8
+
+    limiter = AdaptiveLimiter(initial=16, min_limit=3, cooldown=0)
+    for _ in range(5):
+        limiter.record_failure()
+    assert limiter.current_limit == 3
+
+
+def test_acquire_waits_for_a_free_slot():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=2)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(10)))
+        return peak, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_rps_cap():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=10, rps=20)
+        start = time.monotonic()
+        for _ in range(30):
+            async with limiter:
+                pass
+        return time.monotonic() - start
+
+    # A one-second burst is allowed, the other 10 requests wait for tokens
+    assert 0.4 < asyncio.run(scenario()) < 1.5
+
+
+def test_breaker_trips_at_the_threshold():
+    breaker = CircuitBreaker(window=10, min_samples=4, threshold=0.5, pause=60)
+    for success in (True, False, True):
+        breaker.record(success)
+    assert breaker.trips == 0  # too few samples
+    breaker.record(False)
+    assert breaker.trips == 1
+    assert breaker.open_until > time.monotonic()
+    # Outcomes while open are not counted again
+    for _ in range(10):
+        breaker.record(False)
+    assert breaker.trips == 1
+
+
+def test_breaker_stays_closed_below_the_threshold():
+    breaker = CircuitBreaker(window=10, min_samples=4, threshold=0.5)
+    for success in (True, True, False) * 5:
+        breaker.record(success)
+    assert breaker.trips == 0
+
+
+def test_breaker_wait_pauses_until_it_closes():
+    async def scenario():
+        breaker = CircuitBreaker(min_samples=1, threshold=0.5, pause=0.2)
+        start = time.monotonic()
+        await breaker.wait()
+        closed = time.monotonic() - start
+        breaker.record(False)
+        start = time.monotonic()
+        await breaker.wait()
+        return closed, time.monotonic() - start
+
+    closed, opened = asyncio.run(scenario())
+    assert closed < 0.05
+    assert 0.15 < opened < 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after(' 120 ') == 120.0
+    assert parse_retry_after('soon') is None
+    assert 25 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+    assert parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
+
+
+class FakeResponse:
+    def __init__(self, status, text='', headers=None):
+        self.status = status
+        self._text = text
+        self.headers = headers or {}
+
+    async def text(self):
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class FakeSession:
+    """Answers requests with the given responses in order"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def get(self, url, headers=None):
+        return self.responses.pop(0)
+
+
+def test_retry_backoff_holds_no_slot_or_reservation():
+    async def scenario():
+        scraper = KadrEnicScraper(cache_dir=None, concurrency=1, max_concurrency=1, parse_mode='thread',
+                                  parse_workers=1)
+        scraper.parse_pipeline.start()
+        scraper.session = FakeSession([FakeResponse(503, headers={'Retry-After': '1'}), FakeResponse(200, 'ok')])
+        scraper._retry_delay = lambda attempt, retry_after: 0.2
+        capacity = scraper.parse_pipeline.capacity._value
+        fetch = asyncio.create_task(scraper.fetch_page('http://example.org/', reserve=True))
+        await asyncio.sleep(0.1)  # in the backoff after the 503
+        during = scraper.limiter.in_flight, scraper.parse_pipeline.capacity._value
+        result = await fetch
+        after = scraper.limiter.in_flight, scraper.parse_pipeline.capacity._value
+        await scraper.parse_pipeline.close()
+        return capacity, during, result, after
+
+    capacity, during, result, after = asyncio.run(scenario())
+    assert during == (0, capacity)
+    assert result.status == 200 and result.text == 'ok'
+    assert after == (0, capacity - 1)  # kept for the caller until the page is parsed
+
+
+def test_failed_fetch_returns_its_reservation():
+    async def scenario():
+        scraper = KadrEnicScraper(cache_dir=None, max_attempts=2, parse_mode='thread', parse_workers=1)
+        scraper.parse_pipeline.start()
+        scraper.session = FakeSession([FakeResponse(500), FakeResponse(500)])
+        scraper._retry_delay = lambda attempt, retry_after: 0
+        capacity = scraper.parse_pipeline.capacity._value
+        result = await scraper.fetch_page('http://example.org/', reserve=True)
+        await scraper.parse_pipeline.close()
+        return result, scraper.parse_pipeline.capacity._value == capacity, scraper.metrics.retries
+
+    assert asyncio.run(scenario()) == (None, True, 1)
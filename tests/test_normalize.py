@@ -0,0 +1,92 @@
+"""Name normalization of a finished scraper CSV agrees with learning every row in bulk"""
+
+import argparse
+import csv
+import sqlite3
+
+from normalize import NameNormalizer, normalize_csv
+from scraper import CSV_HEADERS, normalize_output
+
+# Spelling variants from the real listing. The rarer spelling of each comes first, which made it
+# canonical when names were learned one row at a time
+UNIVERSITIES = [
+    'Rusiya Dövlət Ədliyyə Universiteti',
+    'N.İ.Piroqov adına Vinnitsa Milli Tibb Universiteti',
+    'X.A.Yasəvi adına Beynəlxalq Qazax-Türk Universiteti',
+    'Ümumrusiya Dövlət Ədliyyə Universiteti',
+    'M.İ.Piroqov adına Vinnitsa Milli Tibb Universiteti',
+    'X.Ə.Yasəvi adına Beynəlxalq Qazax-Türk Universiteti',
+    'Ümumrusiya Dövlət Ədliyyə Universiteti',
+    'M.İ.Piroqov adına Vinnitsa Milli Tibb Universiteti',
+    'X.Ə.Yasəvi adına Beynəlxalq Qazax-Türk Universiteti',
+    'Rusiya Dövlət Ədliyyə Universiteti',
+    'Ümumrusiya Dövlət Ədliyyə Universiteti',
+    'Bakı Dövlət Universiteti',
+]
+CANONICAL = {
+    'Rusiya Dövlət Ədliyyə Universiteti': 'Ümumrusiya Dövlət Ədliyyə Universiteti',
+    'N.İ.Piroqov adına Vinnitsa Milli Tibb Universiteti': 'M.İ.Piroqov adına Vinnitsa Milli Tibb Universiteti',
+    'X.A.Yasəvi adına Beynəlxalq Qazax-Türk Universiteti': 'X.Ə.Yasəvi adına Beynəlxalq Qazax-Türk Universiteti',
+}
+
+
+def make_rows():
+    rows = []
+    for index, university in enumerate(UNIVERSITIES):
+        row = dict.fromkeys(CSV_HEADERS, '')
+        row.update(page_number=str(index // 4 + 1), name=f"Ad{index} Soyad{index}", university=university,
+                   country='Rusiya Federasiyası', certificate_url=f"https://example.org/getFile/?encyptId=c{index}")
+        rows.append(row)
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_matches_bulk_learning(tmp_path):
+    rows = make_rows()
+    path = tmp_path / 'out.csv'
+    write_csv(path, rows)
+    normalizer = NameNormalizer(str(tmp_path / 'map.json'))
+    normalize_csv(str(path), normalizer)
+
+    bulk = NameNormalizer(None)
+    bulk.learn(make_rows())
+    for field, clusterer in normalizer.fields.items():
+        assert clusterer.mapping() == bulk.fields[field].mapping(), field
+
+    normalizer.save()
+    saved = NameNormalizer(str(tmp_path / 'map.json'))
+    for before, after in zip(rows, read_csv(path)):
+        assert after['university'] == saved.canonical('university', before['university'])
+        assert after['university'] == CANONICAL.get(before['university'], before['university'])
+
+
+def test_apply_does_not_learn():
+    normalizer = NameNormalizer(None)
+    candidate = {'university': UNIVERSITIES[0], 'country': 'Rusiya Federasiyası'}
+    normalizer.apply(candidate)
+    assert candidate['university'] == UNIVERSITIES[0]
+    assert UNIVERSITIES[0] not in normalizer.fields['university']
+
+
+def test_normalize_output_fills_sqlite(tmp_path):
+    path = tmp_path / 'out.csv'
+    write_csv(path, make_rows())
+    args = argparse.Namespace(output=str(path), normalize_map=str(tmp_path / 'map.json'),
+                              sqlite=str(tmp_path / 'out.db'))
+    normalize_output(args)
+
+    with sqlite3.connect(args.sqlite) as conn:
+        stored = dict(conn.execute('SELECT name, university FROM candidates'))
+    assert stored == {row['name']: row['university'] for row in read_csv(path)}
+    assert set(stored.values()) == set(CANONICAL.values()) | {'Bakı Dövlət Universiteti'}
@@ -0,0 +1,46 @@
+"""bs4 / lxml parse_listing parity over the saved listing pages in fixtures/listing_pages"""
+
+import glob
+import os
+import re
+
+import pytest
+
+from scraper import PARSE_BACKENDS, lxml, parse_listing
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'listing_pages')
+PAGE_PATHS = sorted(glob.glob(os.path.join(PAGES_DIR, '*.html')))
+
+
+def load_page(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return int(re.search(r'(\d+)', os.path.basename(path)).group(1)), f.read()
+
+
+@pytest.mark.skipif(lxml is None, reason='the lxml backend needs the lxml package')
+@pytest.mark.parametrize('path', PAGE_PATHS, ids=os.path.basename)
+def test_backends_agree(path):
+    page_num, html = load_page(path)
+    expected = parse_listing(html, page_num, 'bs4')
+    for backend in PARSE_BACKENDS:
+        assert parse_listing(html, page_num, backend) == expected, backend
+
+
+@pytest.mark.parametrize('backend', [b for b in PARSE_BACKENDS if b != 'lxml' or lxml is not None])
+def test_single_line_pos_fallback(backend):
+    page_num, html = load_page(os.path.join(PAGES_DIR, 'page_2.html'))
+    fields = {c['name']: (c.get('country'), c.get('specialization')) for c in parse_listing(html, page_num, backend)}
+    assert fields['Yılmaz Mehmet'] == ('Türkiyə Respublikası', 'Hüquqşünaslıq')
+    assert fields['Smith John'] == ('Böyük Britaniya və Şimali İrlandiya Birləşmiş Krallığı', 'Menecment')
+    assert fields['Petrov İvan'] == ('Rusiya Federasiyası', 'Fizika')
+    assert fields['Wang Li'] == ('Çin Xalq Respublikası', 'Kimya')
+    # No known country ending: the whole line is kept as the country
+    assert fields['Müller Anna'] == ('AlmaniyaMemarlıq', '')
+    assert fields['Kovalenko Olena'] == ('Ukrayna', '')
+    assert fields['Aliyev Rauf'] == ('', '')
+    # No div.pos at all: the fields are never set
+    assert fields['Quliyeva Nərmin'] == (None, None)
+
+
+def test_fixtures_present():
+    assert len(PAGE_PATHS) >= 4
@@ -0,0 +1,98 @@
+"""CandidateIndex bitmap queries against a plain scan of the same rows"""
+
+import random
+from datetime import date
+
+import pytest
+
+from query import CandidateIndex, _bitmap, _row_ids, parse_birth_date
+from scraper import CSV_HEADERS
+
+COUNTRIES = ['Rusiya Federasiyası', 'Türkiyə Respublikası', 'Ukrayna', '--']
+UNIVERSITIES = ['Bakı Dövlət Universiteti', 'Moskva Dövlət Universiteti', 'Ankara Universiteti']
+LEVELS = ['Bakalavr', 'Magistr', '']
+NAMES = ['Əliyev', 'Əhmədov', 'Məmmədov', 'Quliyeva', 'Smith', 'smirnov']
+
+
+def make_rows(count=700, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        row = dict.fromkeys(CSV_HEADERS, '')
+        row.update(name=f"{rng.choice(NAMES)} {index}", country=rng.choice(COUNTRIES),
+                   university=rng.choice(UNIVERSITIES), education_level=rng.choice(LEVELS),
+                   birth_date=rng.choice(['', 'bad', f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}."
+                                                     f"{rng.randint(1985, 2002)}"]))
+        rows.append(tuple(row[h] for h in CSV_HEADERS))
+    return rows
+
+
+def scan(rows, country=None, university=None, born_after=None, born_before=None, name_prefix=None):
+    """Row ids matching the filters, checked one row at a time"""
+    pos = {h: CSV_HEADERS.index(h) for h in CSV_HEADERS}
+    matches = []
+    for row_id, row in enumerate(rows):
+        if country is not None and row[pos['country']] not in ([country] if isinstance(country, str) else country):
+            continue
+        if university is not None and row[pos['university']] != university:
+            continue
+        birth = parse_birth_date(row[pos['birth_date']])
+        if born_after is not None or born_before is not None:
+            if birth is None:
+                continue
+            if isinstance(born_after, int) and birth[0] <= born_after:
+                continue
+            if isinstance(born_after, date) and birth <= (born_after.year, born_after.month, born_after.day):
+                continue
+            if isinstance(born_before, int) and birth[0] >= born_before:
+                continue
+            if isinstance(born_before, date) and birth >= (born_before.year, born_before.month, born_before.day):
+                continue
+        if name_prefix and not row[pos['name']].lower().startswith(name_prefix.lower()):
+            continue
+        matches.append(row_id)
+    return matches
+
+
+@pytest.fixture(scope='module')
+def index():
+    return CandidateIndex(make_rows())
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'country': 'Ukrayna'},
+    {'country': ['Ukrayna', '--'], 'university': 'Ankara Universiteti'},
+    {'born_after': 1995},
+    {'born_before': 1990, 'country': 'Rusiya Federasiyası'},
+    {'born_after': date(1990, 6, 15), 'born_before': date(1994, 3, 1)},
+    {'name_prefix': 'Əh'},
+    {'name_prefix': 'SMI', 'born_after': 1988},
+    {'country': 'Unknown'},
+])
+def test_match_agrees_with_scan(index, filters):
+    expected = scan(index.rows, **filters)
+    assert index.count(**filters) == len(expected)
+    assert index.query(**filters) == [dict(zip(CSV_HEADERS, index.rows[row_id])) for row_id in expected]
+
+
+def test_query_limit(index):
+    expected = scan(index.rows, country='Ukrayna')[:10]
+    assert [row['name'] for row in index.query(limit=10, country='Ukrayna')] == \
+        [index.rows[row_id][CSV_HEADERS.index('name')] for row_id in expected]
+
+
+@pytest.mark.parametrize('row_ids', [[], [0], [7, 8], [3, 64, 65, 1000, 4095], list(range(0, 300, 3))])
+def test_row_ids_round_trip(row_ids):
+    bits = _bitmap(row_ids, 4096)
+    assert _row_ids(bits) == row_ids
+    assert _row_ids(bits, limit=2) == row_ids[:2]
+    assert _row_ids(bits, limit=0) == []
+
+
+def test_save_and_load(index, tmp_path):
+    path = str(tmp_path / 'candidates.idx')
+    index.save(path)
+    loaded = CandidateIndex.load(path)
+    assert loaded.count(country='Ukrayna', born_after=1992) == index.count(country='Ukrayna', born_after=1992)
+    assert CandidateIndex.load(str(tmp_path / 'missing.idx')) is None